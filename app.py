@@ -3,17 +3,50 @@ import os
 from dotenv import load_dotenv
 from flask import Flask, render_template, request, url_for, session, jsonify, redirect
 
-from contribute import process_submit_pr
-from search import search
-from util import fetch_data_from_github
+from contribute import (
+    MAX_REQUEST_BYTES,
+    get_submission_status,
+    process_submit_pr,
+    render_error,
+    resume_submissions,
+)
+from facets import FACETS, GLOBAL_FACETS, normalize_filters
+from github_client import github
+from record_store import record_store, category_key
+from refresh import get_all_records, get_records, get_refresh_stats, schedule_refresh
+from search import (
+    load_index_artifact,
+    page_of_all,
+    search_ids,
+    search_vault,
+    suggest,
+)
+from util import get_record_cache_stats
 
-# TODO: Add filters
 # TODO: OpenVault API for developers?
 
 load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY")
+# Reject oversized uploads before the body is read
+app.config["MAX_CONTENT_LENGTH"] = MAX_REQUEST_BYTES
+
+# Cards rendered per page load and per infinite-scroll request ("0" renders all)
+CARDS_PER_PAGE = int(os.getenv("CARDS_PER_PAGE", "24"))
+
+# Card markup for each base, shared by category pages and /api/search
+CARD_TEMPLATES = {
+    "code": "ftc/bases/code-cards.html",
+    "cad": "ftc/bases/cad-cards.html",
+    "portfolios": "ftc/bases/portfolio-cards.html",
+}
+
+# Serve searches from the index shipped with the deployment, if one was built
+load_index_artifact()
+
+# Finish submissions a previous instance accepted but did not get to GitHub
+resume_submissions()
 
 
 @app.context_processor
@@ -37,13 +70,24 @@ def contribute():
 
 @app.route("/<base>/<category>")
 def render_page(base, category):
-    records = fetch_data_from_github(base, category)
-    session["records"] = records
+    records = get_records(base, category)
     session["curr_template"] = f"ftc/{base}/{category}.html"
     session["base"] = base
     session["category"] = category
 
-    return render_template(session["curr_template"], records=records)
+    # Only the first page of cards is sent; the rest load as the user scrolls
+    page = max(request.args.get("page", 1, type=int), 1)
+    offset = 0
+    next_page = None
+    if isinstance(records, list) and CARDS_PER_PAGE:
+        offset = (page - 1) * CARDS_PER_PAGE
+        if offset + CARDS_PER_PAGE < len(records):
+            next_page = page + 1
+        records = records[offset : offset + CARDS_PER_PAGE]
+
+    return render_template(
+        session["curr_template"], records=records, offset=offset, next_page=next_page
+    )
 
 
 # For legacy purposes/ease of use. You can access portfolios through /portfolios/portfolios
@@ -56,52 +100,142 @@ def portfolios():
 
 @app.route("/api/search", methods=["POST"])
 def search_api():
+    """
+    Rank the active category's records for a query.
+    Returns one page of record IDs and scores. With "render", the page's cards
+    are included as HTML for the page to insert, and page_size defaults to
+    CARDS_PER_PAGE. An empty query pages through every record.
+
+    "filters" ({"season": [...], "tag": [...], "language": [...],
+    "used_in_comp": [...]}) narrows the results, and "facets": true adds the
+    number of matching records per facet value.
+
+    "global": true searches every category at once instead. Hits then carry
+    their base and category, "categories" counts the matches per category, and
+    "base" and "category" ("code/vision") can be used as filters.
+    """
     search_query = request.json.get("query", "").strip()
-    curr_template = session.get("curr_template")
+    highlight = bool(request.json.get("highlight", False))
+    render = bool(request.json.get("render", False))
+    with_facets = bool(request.json.get("facets", False))
+    whole_vault = bool(request.json.get("global", False))
+    try:
+        filters = normalize_filters(
+            request.json.get("filters"), GLOBAL_FACETS if whole_vault else FACETS
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    page_size = request.json.get("page_size")
+    if not page_size and render:
+        page_size = CARDS_PER_PAGE
+    try:
+        page = max(int(request.json.get("page", 1)), 1)
+        page_size = max(int(page_size), 1) if page_size else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "page and page_size must be integers"}), 400
+
+    if whole_vault:
+        if render:
+            return jsonify({"error": "render is not supported for global search"}), 400
+        found = search_vault(
+            search_query,
+            get_all_records(),
+            page=page,
+            page_size=page_size,
+            highlight=highlight,
+            filters=filters,
+            facets=with_facets,
+        )
+        response = _search_response(search_query, found, page, page_size)
+        response["categories"] = found["categories"]
+        return jsonify(response)
+
     base = session.get("base")
     category = session.get("category")
 
-    # Always fetch fresh data for search to ensure we have the latest content
-    if base and category:
-        records = fetch_data_from_github(base, category)
-        # Update session with fresh data
-        session["records"] = records
-    else:
-        records = session.get("records")
+    # Served from cache; stale records are refreshed in the background
+    records = get_records(base, category) if base and category else None
 
-    if not records:
+    if not records or not isinstance(records, list):
         return jsonify({"error": "No records available"}), 400
 
-    if not search_query:
-        return (
-            jsonify({"template": render_template(curr_template, records=records)}),
-            200,
-        )
-
     try:
-        # Use new Whoosh-based search
-        similarities, ranked_indices = search(search_query, records=records)
-
-        # Filter results with meaningful similarity scores
-        threshold = 0.01
-        filtered = [
-            (ranked_indices[i], similarities[i])
-            for i in range(len(similarities))
-            if similarities[i] >= threshold
-        ]
-
-        # Sort by similarity score (already sorted by Whoosh, but ensuring order)
-        filtered = sorted(filtered, key=lambda x: x[1], reverse=True)
-        filtered_records = [records[i] for i, _ in filtered]
-
-        rendered_template = render_template(curr_template, records=filtered_records)
-        return jsonify({"template": rendered_template})
-
+        found = search_ids(
+            search_query,
+            records,
+            base=base,
+            category=category,
+            page=page,
+            page_size=page_size,
+            highlight=highlight,
+            filters=filters,
+            facets=with_facets,
+        )
     except Exception as e:
         print(f"Search error: {e}")
-        # Fallback to original records on error
-        rendered_template = render_template(curr_template, records=records)
-        return jsonify({"template": rendered_template})
+        # Fallback to one page of the original records on error
+        found = page_of_all(records, page, page_size)
+
+    response = _search_response(search_query, found, page, page_size)
+    results = response["results"]
+
+    if render and base in CARD_TEMPLATES:
+        records_by_id = {record["uuid"]: record for record in records}
+        response["html"] = render_template(
+            CARD_TEMPLATES[base],
+            records=[records_by_id[hit["id"]] for hit in results],
+            offset=(page - 1) * page_size if page_size else 0,
+        )
+
+    return jsonify(response)
+
+
+def _search_response(search_query, found, page, page_size):
+    """The /api/search response for one page of ranked hits"""
+    # Filter results with meaningful similarity scores; they are already ranked
+    threshold = 0.01
+    results = []
+    for hit in found["results"]:
+        if hit["score"] >= threshold:
+            hit["score"] = round(hit["score"], 4)
+            results.append(hit)
+
+    response = {
+        "query": search_query,
+        "total": found["total"],
+        "page": page,
+        "page_size": page_size,
+        "next_page": (
+            page + 1 if page_size and page * page_size < found["total"] else None
+        ),
+        "results": results,
+    }
+    if "facets" in found:
+        response["facets"] = found["facets"]
+    return response
+
+
+@app.route("/api/suggest", methods=["GET"])
+def suggest_api():
+    """
+    Type-ahead completions for the active category: titles, authors, tags and
+    team numbers starting with ?q=, served from a precomputed term dictionary.
+    """
+    prefix = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 8, type=int), 1), 20)
+    base = session.get("base")
+    category = session.get("category")
+    if not base or not category:
+        return jsonify({"error": "No active category"}), 400
+
+    suggestions = suggest(
+        prefix,
+        base,
+        category,
+        limit=limit,
+        load_records=lambda: get_records(base, category),
+    )
+    return jsonify({"query": prefix, "suggestions": suggestions})
 
 
 @app.route("/api/refresh-search-index", methods=["POST"])
@@ -113,16 +247,17 @@ def refresh_search_index():
     if not base or not category:
         return jsonify({"error": "No active category to refresh"}), 400
 
-    try:
-        # Fetch fresh data from GitHub
-        records = fetch_data_from_github(base, category)
-        session["records"] = records
-
-        # Force rebuild of search index by clearing the hash
-        from search import force_index_rebuild
-
-        force_index_rebuild()
-
+    # Revalidate against GitHub and rebuild the index without blocking searches
+    refresh = schedule_refresh(base, category, rebuild=True)
+
+    if request.is_json and request.json.get("wait"):
+        refresh.done.result()
+        records = refresh.records.result()
+        if not isinstance(records, list):
+            return (
+                jsonify({"error": records.get("error", "Failed to fetch records")}),
+                502,
+            )
         return jsonify(
             {
                 "success": True,
@@ -130,19 +265,28 @@ def refresh_search_index():
             }
         )
 
-    except Exception as e:
-        return jsonify({"error": f"Failed to refresh search index: {str(e)}"}), 500
+    return (
+        jsonify({"success": True, "message": "Search index refresh started"}),
+        202,
+    )
 
 
 @app.route("/api/search-stats", methods=["GET"])
 def search_stats():
     """Get statistics about the current search index"""
-    records = session.get("records", [])
+    base = session.get("base")
+    category = session.get("category")
+    records = []
+    if base and category:
+        records = record_store.get(category_key(base, category)) or []
 
     try:
         from search import get_search_stats
 
-        stats = get_search_stats(records)
+        stats = get_search_stats(records, base, category)
+        stats["record_cache"] = get_record_cache_stats()
+        stats["background_refresh"] = get_refresh_stats()
+        stats["github"] = github.metrics()
         return jsonify(stats)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -155,5 +299,23 @@ def submit_pr():
     return process_submit_pr(request)
 
 
+@app.route("/api/submissions/<submission_id>")
+def submission_status(submission_id):
+    """Progress of a queued contribute-form submission"""
+    status = get_submission_status(submission_id)
+    if status is None:
+        return jsonify({"error": "Submission not found"}), 404
+    return jsonify(status)
+
+
+@app.errorhandler(413)
+def upload_too_large(error):
+    session["curr_template"] = "ftc/contribute.html"
+    page, _ = render_error(
+        f"Upload is larger than the {MAX_REQUEST_BYTES // (1024 * 1024)} MB limit"
+    )
+    return page, 413
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,1168 @@
+"""
+Performance benchmarks for OpenVault, run against a local stand-in GitHub server.
+
+Usage:
+    python benchmark.py fetch [--entries=100] [--latency=0.02]
+    python benchmark.py cache [--entries=100] [--latency=0.02]
+    python benchmark.py rebuilds [--entries=100] [--searches=1000]
+    python benchmark.py coldstart [--entries=100] [--latency=0.02]
+    python benchmark.py query [--sizes 10000 100000]
+    python benchmark.py changes [--sizes 10000 100000]
+    python benchmark.py submit [--latency=0.05] [--upload-kb=512]
+    python benchmark.py upload [--sizes 1 10 50]
+    python benchmark.py crawl [--entries=50] [--latency=0.02]
+    python benchmark.py mirror [--entries=100] [--latency=0.02]
+    python benchmark.py stale [--entries=100] [--latency=0.02]
+    python benchmark.py coalesce [--entries=100] [--concurrency=20]
+    python benchmark.py ratelimit [--entries=100] [--requests=150]
+    python benchmark.py pages [--entries=1000]
+    python benchmark.py restart [--entries=50] [--latency=0.02]
+    python benchmark.py facets [--sizes 10000 100000]
+    python benchmark.py results [--entries=10000] [--searches=1000]
+    python benchmark.py suggest [--entries=10000] [--lookups=1000]
+    python benchmark.py global [--entries=50] [--latency=0.02]
+
+Examples:
+    # Compare sequential and concurrent info.json fetching for one category
+    python benchmark.py fetch --entries=150 --latency=0.05
+
+    # Cold fetch vs TTL hit vs ETag revalidation for one category
+    python benchmark.py cache
+
+    # Index rebuilds, updates and documents written per 1,000 searches with
+    # per-fetch random IDs vs stable IDs
+    python benchmark.py rebuilds
+
+    # Time to first search on a cold instance with and without a prebuilt index
+    python benchmark.py coldstart
+
+    # Query-path scaling with synthetic records (index build time is excluded)
+    python benchmark.py query --sizes 1000 10000 100000
+
+    # Cost of checking whether an index is current, per search
+    python benchmark.py changes
+
+    # Latency and GitHub API calls of one contribute-form submission
+    python benchmark.py submit
+
+    # Peak memory of uploading a 1, 10 and 50 MB file as a git blob
+    python benchmark.py upload --sizes 1 10 50
+
+    # Full-vault info.json crawl: sequential, concurrent, and resumed
+    python benchmark.py crawl
+
+    # Mirror sync cost and category reads from GitHub vs a local mirror
+    python benchmark.py mirror
+
+    # Latency of the first page view after the record TTL expires
+    python benchmark.py stale
+
+    # GitHub requests when many users open the same cold category at once
+    python benchmark.py coalesce --concurrency=50
+
+    # Category fetches through transient errors and a tight rate limit
+    python benchmark.py ratelimit --rate-limit=100 --window=5
+
+    # Size and render time of a category page with and without pagination
+    python benchmark.py pages --entries=2000
+
+    # GitHub requests to reload the whole vault after a restart
+    python benchmark.py restart
+
+    # Season/language filtering with facet counts: per-record scan vs bitmaps
+    python benchmark.py facets
+
+    # Repeated popular queries with and without the search result cache
+    python benchmark.py results --entries=20000
+
+    # Type-ahead latency: spelling corrector per call vs the prefix dictionary
+    python benchmark.py suggest
+
+    # Finding a team across the vault: every category page vs one global search
+    python benchmark.py global
+"""
+
+import argparse
+import base64
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+
+import search
+import util
+from fake_github import FakeGitHub, generate_vault, make_info_json
+from query_cache import QueryCache
+
+
+def point_util_at(server):
+    """Redirect util's GitHub URLs to the fake server"""
+    util.GITHUB_API_BASE = server.api_base
+    util.GITHUB_RAW_ROOT = server.raw_root
+    util.GITHUB_RAW_BASE = server.raw_base
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def bench_fetch(args):
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+
+        print(f"{args.entries} entries, {args.latency * 1000:.0f} ms simulated latency")
+        print(f"{'workers':>8} {'seconds':>10} {'requests':>10} {'speedup':>8}")
+
+        baseline = None
+        for workers in args.workers:
+            util.clear_record_cache()
+            server.request_count = 0
+            records, elapsed = timed(
+                util.fetch_data_from_github, "code", "autonomous", max_workers=workers
+            )
+            assert len(records) == args.entries, records
+            baseline = baseline or elapsed
+            print(
+                f"{workers:>8} {elapsed:>10.3f} {server.request_count:>10} "
+                f"{baseline / elapsed:>7.1f}x"
+            )
+
+
+def bench_cache(args):
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+        util.clear_record_cache()
+
+        print(f"{args.entries} entries, {args.latency * 1000:.0f} ms simulated latency")
+        print(f"{'scenario':<28} {'seconds':>10} {'requests':>10}")
+
+        def run(label, **kwargs):
+            server.request_count = 0
+            records, elapsed = timed(
+                util.fetch_data_from_github, "code", "autonomous", **kwargs
+            )
+            assert len(records) == args.entries, records
+            print(f"{label:<28} {elapsed:>10.4f} {server.request_count:>10}")
+
+        run("cold (miss)")
+        run("within TTL (hit)")
+        run("revalidate, unchanged", force_refresh=True)
+
+        changed = next(path for path in server.files if path.endswith("info.json"))
+        server.files[changed] = server.files[changed].replace(b"Synthetic", b"Edited")
+        run("revalidate, one file edited", force_refresh=True)
+
+        print(util.get_record_cache_stats())
+
+
+def refetched_records(payloads, random_ids=False):
+    """Records exactly as a fresh fetch_data_from_github call would build them"""
+    records = []
+    for name, payload in payloads:
+        record = util.build_record("code", "autonomous", name, payload)
+        if random_ids:
+            # Pre-stable-ID behaviour: every fetch minted new uuid4s
+            record["uuid"] = str(uuid.uuid4())
+        records.append(record)
+    return records
+
+
+def bench_rebuilds(args):
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    payloads = [
+        (path.split("/")[3], json.loads(content))
+        for path, content in sorted(files.items())
+        if path.endswith("info.json")
+    ]
+
+    print(
+        f"{args.entries} records, {args.searches} searches, records refetched each time"
+    )
+    print(
+        f"{'record ids':<12} {'rebuilds':>10} {'updates':>10} {'docs written':>14} "
+        f"{'seconds':>10}"
+    )
+
+    for label, random_ids in [("uuid4", True), ("stable", False)]:
+        engine = search.WhooshSearchEngine(use_memory=True)
+        written = 0  # Documents added, rewritten or deleted across all searches
+        start = time.perf_counter()
+        for i in range(args.searches):
+            records = refetched_records(payloads, random_ids=random_ids)
+            builds, updates = engine.build_count, engine.update_count
+            engine.search(f"entry {i % args.entries}", records)
+            if engine.build_count > builds:
+                written += len(records)
+            elif engine.update_count > updates:
+                written += sum(engine.last_update.values())
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<12} {engine.build_count:>10} {engine.update_count:>10} "
+            f"{written:>14} {elapsed:>10.2f}"
+        )
+
+
+def cold_instance():
+    """Forget everything a warm instance would have in memory"""
+    util.clear_record_cache()
+    search._registry = search.IndexRegistry()
+
+
+def first_search(server, artifact=None):
+    cold_instance()
+    server.request_count = 0
+    start = time.perf_counter()
+    if artifact:
+        search.load_index_artifact(artifact)
+    records = util.fetch_data_from_github("code", "autonomous")
+    search.search("odometry", records, "code", "autonomous")
+    return time.perf_counter() - start, server.request_count
+
+
+def bench_coldstart(args):
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    with FakeGitHub(
+        files, latency=args.latency
+    ) as server, tempfile.TemporaryDirectory() as artifact:
+        point_util_at(server)
+        cold_instance()
+        search.write_index_artifact(artifact, {"code": ["autonomous"]})
+
+        print(f"{args.entries} entries, {args.latency * 1000:.0f} ms simulated latency")
+        print(f"{'cold start':<30} {'seconds':>10} {'requests':>10}")
+
+        for label, kwargs in [
+            ("crawl + build (no artifact)", {}),
+            ("prebuilt, unchanged", {"artifact": artifact}),
+        ]:
+            elapsed, requests = first_search(server, **kwargs)
+            print(f"{label:<30} {elapsed:>10.4f} {requests:>10}")
+
+        changed = next(path for path in server.files if path.endswith("info.json"))
+        server.files[changed] = server.files[changed].replace(b"Synthetic", b"Edited")
+        elapsed, requests = first_search(server, artifact=artifact)
+        print(f"{'prebuilt, one file edited':<30} {elapsed:>10.4f} {requests:>10}")
+
+
+def legacy_assembly(hit_indices, total):
+    """Result assembly as it was before positions were precomputed (O(n^2))"""
+    ranked_indices = list(hit_indices)
+    remaining_indices = [i for i in range(total) if i not in ranked_indices]
+    return ranked_indices + remaining_indices
+
+
+def bench_query(args):
+    print(f"{'records':>8} {'query':<10} {'path':<22} {'ms':>10} {'us/record':>10}")
+
+    for size in args.sizes:
+        records = [
+            util.build_record(
+                "code", "autonomous", f"entry-{i:06d}", make_info_json("code", i)
+            )
+            for i in range(size)
+        ]
+        engine = search.WhooshSearchEngine(use_memory=True)
+        _, build_seconds = timed(engine.build_index, records)
+        print(f"{size:>8} (index built in {build_seconds:.1f}s)")
+
+        # "synthetic" matches every record, "tag3" matches a fifth of them
+        for query in ["synthetic", "tag3"]:
+            engine.search(query, records)  # Warm up the searcher
+
+            paths = [
+                ("full ranking", lambda: engine.search(query, records)),
+                (
+                    "top 20 (page 1)",
+                    lambda: engine.search_ids(query, records, page_size=20),
+                ),
+            ]
+            if size <= args.legacy_max:
+                similarities, ranked = engine.search(query, records)
+                hits = [i for i, score in zip(ranked, similarities) if score]
+                paths.append(
+                    ("legacy assembly only", lambda: legacy_assembly(hits, size))
+                )
+
+            for label, func in paths:
+                _, elapsed = timed(func)
+                print(
+                    f"{size:>8} {query:<10} {label:<22} {elapsed * 1000:>10.1f} "
+                    f"{elapsed / size * 1e6:>10.2f}"
+                )
+
+
+def bench_changes(args):
+    print(f"{'records':>8} {'change detection':<28} {'ms/check':>10}")
+
+    for size in args.sizes:
+        records = [
+            util.build_record(
+                "code", "autonomous", f"entry-{i:06d}", make_info_json("code", i)
+            )
+            for i in range(size)
+        ]
+        # As fetch_data_from_github returns them: one git SHA per entry directory
+        fingerprints = {
+            record["uuid"]: hashlib.sha1(record["uuid"].encode()).hexdigest()
+            for record in records
+        }
+        versioned = util.RecordList(
+            records, util._records_version(records, fingerprints), fingerprints
+        )
+
+        engine = search.WhooshSearchEngine(use_memory=True)
+        for label, candidate in [
+            ("json.dumps + md5 (plain list)", list(records)),
+            ("upstream version marker", versioned.copy()),
+        ]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                engine._needs_rebuild(candidate)
+            elapsed = (time.perf_counter() - start) / args.repeat
+            print(f"{size:>8} {label:<28} {elapsed * 1000:>10.4f}")
+
+
+def submission_form(upload_bytes, title="Benchmark Auto"):
+    return {
+        "email": "team@example.com",
+        "teamNumber": "12345",
+        "title": title,
+        "author": "Benchmark",
+        "description": "Submitted by benchmark.py",
+        "category": "Code",
+        "codeSubcategory": "autonomous",
+        "codeSource": "zip",
+        "seasons": ["2024-2025"],
+        "tags": '["benchmark"]',
+        "languageUsed": "Java",
+        "previewImage": (io.BytesIO(b"\x89PNG" * 256), "preview.png"),
+        "codeUpload": (io.BytesIO(b"0" * upload_bytes), "code.zip"),
+    }
+
+
+def bench_submit(args):
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import app
+    import contribute
+
+    files = generate_vault(5, {"code": ["autonomous"]})
+    with FakeGitHub(files, latency=args.latency) as server:
+        contribute.GITHUB_API_URL = server.api_base
+        client = app.app.test_client()
+        client.get("/contribute")
+
+        server.calls.clear()
+        form = submission_form(args.upload_kb * 1024)
+        start = time.perf_counter()
+        response = client.post(
+            "/submit-pr", data=form, content_type="multipart/form-data"
+        )
+        elapsed = time.perf_counter() - start
+
+        # The GitHub work happens in the background; wait for it to finish
+        submission_id = re.search(rb'data-submission-id="(\w+)"', response.data).group(
+            1
+        )
+        status = None
+        while status not in ("submitted", "failed"):
+            time.sleep(0.01)
+            status = client.get(f"/api/submissions/{submission_id.decode()}").json[
+                "status"
+            ]
+        completed = time.perf_counter() - start
+
+        commits = len(server.commits) - 1
+        print(f"{args.latency * 1000:.0f} ms simulated latency")
+        print(f"submit response: {elapsed:.3f}s")
+        print(f"submission {status}: {completed:.3f}s")
+        print(f"GitHub API calls: {len(server.calls)}, commits created: {commits}")
+        for method, path in server.calls:
+            print(f"  {method:<6} {path.split('/OpenVaultFiles/')[-1]}")
+
+
+def proc_status_kb(field):
+    """VmRSS (current) or VmHWM (peak) of this process in KB"""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+
+
+def upload_peak_rss(path, api_base, streaming):
+    """Peak RSS growth in MB of uploading one file as a blob, in a fresh process"""
+    import contribute
+
+    contribute.GITHUB_API_URL = api_base
+    # Peak RSS is a high-water mark, so measure growth from the current RSS
+    baseline = proc_status_kb("VmRSS")
+
+    with open(path, "rb") as file:
+        if streaming:
+            sha = contribute.create_blob(contribute.encode_blob(file))
+        else:
+            # The previous upload path: whole file, then its base64 string
+            encoded = base64.b64encode(file.read()).decode("utf-8")
+            response = contribute.github.post(
+                f"{api_base}/git/blobs",
+                json={"content": encoded, "encoding": "base64"},
+            )
+            sha = response.json()["sha"]
+
+    assert isinstance(sha, str), sha
+    peak = proc_status_kb("VmHWM")
+    return (peak - baseline) / 1024
+
+
+def bench_upload(args):
+    # Each upload runs in a new process so peak RSS is not carried over
+    context = multiprocessing.get_context("spawn")
+
+    with FakeGitHub({}) as server, tempfile.TemporaryDirectory() as tmp:
+        print(f"{'size (MB)':>9} {'read + b64encode':>18} {'streamed':>10}")
+        for size in args.sizes:
+            path = os.path.join(tmp, f"upload-{size}.bin")
+            with open(path, "wb") as file:
+                file.write(os.urandom(size * 1024 * 1024))
+
+            peaks = []
+            for streaming in (False, True):
+                with context.Pool(1) as pool:
+                    peaks.append(
+                        pool.apply(upload_peak_rss, (path, server.api_base, streaming))
+                    )
+            print(f"{size:>9} {peaks[0]:>15.1f} MB {peaks[1]:>7.1f} MB")
+
+
+def legacy_crawl(server):
+    """The previous crawl: one listing per category, then one GET per info.json"""
+    import requests
+
+    files = []
+    for section, subsections in util.SECTIONS.items():
+        for subsection in subsections:
+            listing = requests.get(
+                f"{server.api_base}/contents/ftc/{section}/{subsection}"
+            )
+            for entry in listing.json():
+                if entry["type"] == "dir" and "filler" not in entry["name"]:
+                    path = f"ftc/{section}/{subsection}/{entry['name']}/info.json"
+                    files.append(requests.get(f"{server.raw_base}/{path}").json())
+    return files
+
+
+def bench_crawl(args):
+    import migrate_info_files
+
+    files = generate_vault(args.entries)
+    with FakeGitHub(
+        files, latency=args.latency
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        migrate_info_files.API_BASE = server.api_base
+        migrate_info_files.RAW_ROOT = server.raw_root
+        cache_path = os.path.join(tmp, "checkpoint.json")
+
+        print(f"{args.latency * 1000:.0f} ms simulated latency")
+        print(f"{'crawl':<28} {'files':>6} {'requests':>9} {'seconds':>8}")
+
+        def report(label, func, *func_args, **func_kwargs):
+            server.calls.clear()
+            result, elapsed = timed(func, *func_args, **func_kwargs)
+            print(
+                f"{label:<28} {len(result):>6} {len(server.calls):>9} {elapsed:>8.2f}"
+            )
+
+        report("sequential (previous)", legacy_crawl, server)
+        report(
+            f"concurrent ({args.workers} workers)",
+            migrate_info_files.fetch_all_info_files,
+            workers=args.workers,
+            cache_path=cache_path,
+        )
+
+        # Simulate an interrupted run that only checkpointed half the files
+        with open(cache_path) as f:
+            checkpoint = json.load(f)
+        with open(cache_path, "w") as f:
+            json.dump(dict(list(checkpoint.items())[: len(checkpoint) // 2]), f)
+        report(
+            "resumed after interrupt",
+            migrate_info_files.fetch_all_info_files,
+            workers=args.workers,
+            cache_path=cache_path,
+        )
+        report(
+            "rerun, nothing changed",
+            migrate_info_files.fetch_all_info_files,
+            workers=args.workers,
+            cache_path=cache_path,
+        )
+
+
+def bench_mirror(args):
+    from github_client import github
+    from mirror import LocalMirror
+
+    files = generate_vault(args.entries)
+    with FakeGitHub(
+        files, latency=args.latency
+    ) as server, tempfile.TemporaryDirectory() as tmp:
+        point_util_at(server)
+        mirror = LocalMirror(tmp)
+
+        def sync(label):
+            server.calls.clear()
+            result, elapsed = timed(
+                mirror.sync, github, server.api_base, server.raw_root
+            )
+            print(
+                f"{label:<24} {len(server.calls):>4} requests, "
+                f"{result['downloaded']:>5} downloaded, {elapsed:.2f}s"
+            )
+
+        print(f"{args.latency * 1000:.0f} ms simulated latency, {len(files)} files")
+        sync("first sync")
+        sync("sync, nothing changed")
+        path = "ftc/code/autonomous/entry-00000/info.json"
+        server.files[path] = server.files[path].replace(b"Synthetic", b"Edited")
+        sync("sync, one file changed")
+
+        print(f"\n{'read of code/autonomous':<28} {'ms':>10}")
+        util.clear_record_cache()
+        from_github, elapsed = timed(util.fetch_data_from_github, "code", "autonomous")
+        print(f"{'GitHub, cold':<28} {elapsed * 1000:>10.3f}")
+        mirrored, elapsed = timed(
+            util.fetch_data_from_mirror, "code", "autonomous", mirror_path=tmp
+        )
+        print(f"{'mirror, cold':<28} {elapsed * 1000:>10.3f}")
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            util.fetch_data_from_mirror("code", "autonomous", mirror_path=tmp)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{'mirror, warm':<28} {elapsed * 1000:>10.3f}")
+
+        assert list(from_github) == list(mirrored), "mirror records differ from GitHub"
+
+
+def bench_stale(args):
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import app
+    import refresh
+
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+        client = app.app.test_client()
+        client.get("/")
+
+        print(f"{args.latency * 1000:.0f} ms simulated latency")
+        print(f"{'mode':<28} {'first view after TTL (ms)':>26}")
+        for label, enabled in [
+            ("inline revalidation", False),
+            ("stale-while-revalidate", True),
+        ]:
+            refresh.STALE_WHILE_REVALIDATE = enabled
+            util.clear_record_cache()
+            search.force_index_rebuild()
+            client.get("/code/autonomous")
+            client.post("/api/search", json={"query": "autonomous"})
+
+            # Expire the cached records and change one entry upstream
+            for key in list(util._record_cache):
+                util._record_cache[key]["fetched_at"] = float("-inf")
+            path = "ftc/code/autonomous/entry-00000/info.json"
+            server.files[path] = server.files[path].replace(b"entry", b"Entry")
+
+            _, elapsed = timed(client.get, "/code/autonomous")
+            print(f"{label:<28} {elapsed * 1000:>26.1f}")
+            for pending in list(refresh._in_flight.values()):
+                pending.done.result()
+
+
+def bench_coalesce(args):
+    import threading
+
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+
+        def crawl_uncoalesced():
+            # The crawl every caller used to run on its own
+            util._revalidate_category("code", "autonomous", None, None)
+
+        def crawl_coalesced():
+            util.fetch_data_from_github("code", "autonomous")
+
+        print(f"{args.concurrency} concurrent cold requests, {args.entries} entries")
+        print(f"{'mode':<16} {'GitHub requests':>16} {'seconds':>8}")
+        for label, crawl in [
+            ("independent", crawl_uncoalesced),
+            ("single-flight", crawl_coalesced),
+        ]:
+            util.clear_record_cache()
+            server.calls.clear()
+            threads = [threading.Thread(target=crawl) for _ in range(args.concurrency)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print(f"{label:<16} {len(server.calls):>16} {elapsed:>8.2f}")
+
+
+def bench_ratelimit(args):
+    import requests
+    from concurrent.futures import ThreadPoolExecutor
+
+    from github_client import GitHubClient
+
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    clients = [
+        ("plain session", requests.Session),
+        ("GitHubClient", lambda: GitHubClient(token=None, backoff_base=0.1)),
+    ]
+
+    print(f"Cold fetch of {args.entries} entries with injected errors")
+    print(f"{'client':<16} {'records':>8} {'retries':>8} {'seconds':>8}")
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+        for label, make_client in clients:
+            client = util.github = make_client()
+            util.clear_record_cache()
+            # A burst of failures right as the category listing is requested
+            server.injected_errors.clear()
+            server.inject_errors(503, 502)
+            server.inject_errors(429, retry_after=1)
+            server.inject_errors(*[500] * args.errors)
+            records, elapsed = timed(
+                util.fetch_data_from_github, "code", "autonomous", max_workers=8
+            )
+            count = len(records) if isinstance(records, list) else "error"
+            retries = client.metrics()["retries"] if label == "GitHubClient" else 0
+            print(f"{label:<16} {count!s:>8} {retries:>8} {elapsed:>8.2f}")
+
+    print(
+        f"\n{args.requests} API requests against a limit of {args.rate_limit} "
+        f"per {args.window:g}s"
+    )
+    print(
+        f"{'client':<16} {'ok':>6} {'403s':>6} {'throttle wait s':>16} {'seconds':>8}"
+    )
+    url_path = "contents/ftc/code/autonomous"
+    for label, make_client in clients:
+        with FakeGitHub(
+            files,
+            latency=args.latency,
+            rate_limit=args.rate_limit,
+            rate_limit_window=args.window,
+        ) as server:
+            client = make_client()
+            if label == "GitHubClient":
+                client.throttle_threshold = args.rate_limit // 2
+                client.max_wait = args.window * 2
+
+            def burst():
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    url = f"{server.api_base}/{url_path}"
+                    responses = executor.map(
+                        lambda _: client.get(url), range(args.requests)
+                    )
+                    return [response.status_code for response in responses]
+
+            statuses, elapsed = timed(burst)
+            throttled = (
+                client.metrics()["throttled_seconds"] if label == "GitHubClient" else 0
+            )
+            print(
+                f"{label:<16} {statuses.count(200):>6} {statuses.count(403):>6} "
+                f"{throttled:>16.1f} {elapsed:>8.2f}"
+            )
+
+    util.github = GitHubClient()
+
+
+def bench_pages(args):
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import app
+
+    files = generate_vault(args.entries, {"code": ["autonomous"]})
+    with FakeGitHub(files) as server:
+        point_util_at(server)
+        client = app.app.test_client()
+        client.get("/code/autonomous")
+
+        print(f"{args.entries} records in code/autonomous")
+        print(f"{'mode':<24} {'cards':>6} {'KB':>8} {'ms':>8}")
+        for label, per_page in [("all cards", 0), ("paged", args.page_size)]:
+            app.CARDS_PER_PAGE = per_page
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                response = client.get("/code/autonomous")
+            elapsed = (time.perf_counter() - start) / args.repeat
+            cards = response.data.count(b"data-record-id=")
+            print(
+                f"{label:<24} {cards:>6} {len(response.data) / 1024:>8.0f} "
+                f"{elapsed * 1000:>8.1f}"
+            )
+
+        # The first request builds the search index; time the warm requests
+        client.post("/api/search", json={"query": ""})
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.post(
+                "/api/search", json={"query": "", "page": 2, "render": True}
+            )
+        elapsed = (time.perf_counter() - start) / args.repeat
+        data = response.get_json()
+        print(
+            f"{'next page (scroll)':<24} {len(data['results']):>6} "
+            f"{len(response.data) / 1024:>8.0f} {elapsed * 1000:>8.1f}"
+        )
+
+
+def bench_restart(args):
+    from blob_cache import blob_cache
+
+    if blob_cache is None:
+        raise SystemExit("The blob cache is disabled (BLOB_CACHE_MAX_MB=0)")
+
+    files = generate_vault(args.entries)
+    categories = [
+        (section, sub_section)
+        for section, sub_sections in util.SECTIONS.items()
+        for sub_section in sub_sections
+    ]
+
+    def load_vault():
+        for section, sub_section in categories:
+            records = util.fetch_data_from_github(section, sub_section)
+            assert isinstance(records, list), records
+
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+        print(
+            f"{len(categories)} categories, {args.entries} entries each, "
+            f"{args.latency * 1000:.0f} ms simulated latency"
+        )
+        print(f"{'after restart':<20} {'GitHub requests':>16} {'seconds':>8}")
+        for label, keep_blobs in [("memory cache only", False), ("blob cache", True)]:
+            util.clear_record_cache()
+            load_vault()
+
+            # A restart loses the in-memory record cache but not the blob cache
+            util._record_cache.clear()
+            if not keep_blobs:
+                blob_cache.clear()
+            server.calls.clear()
+            _, elapsed = timed(load_vault)
+            print(f"{label:<20} {len(server.calls):>16} {elapsed:>8.2f}")
+
+
+def scan_facets(records, filters):
+    """Filter and count by walking every record, as the season tabs used to"""
+    from facets import FACETS
+
+    def matches(record, skip=None):
+        return all(
+            set(map(str, FACETS[facet](record))) & set(values)
+            for facet, values in filters.items()
+            if facet != skip
+        )
+
+    hits = [record["uuid"] for record in records if matches(record)]
+    counts = {}
+    for facet, values_of in FACETS.items():
+        facet_counts = counts.setdefault(facet, {})
+        for record in records:
+            if matches(record, skip=facet):
+                for value in values_of(record):
+                    facet_counts[str(value)] = facet_counts.get(str(value), 0) + 1
+    return hits, counts
+
+
+def bench_facets(args):
+    filters = {"season": ["2024-2025"], "language": ["Java"]}
+    print(f"filters: {filters}")
+    print(f"{'records':>8} {'path':<32} {'hits':>7} {'ms':>10}")
+
+    for size in args.sizes:
+        records = [
+            util.build_record(
+                "code", "autonomous", f"entry-{i:06d}", make_info_json("code", i)
+            )
+            for i in range(size)
+        ]
+        fingerprints = {
+            record["uuid"]: hashlib.sha1(record["uuid"].encode()).hexdigest()
+            for record in records
+        }
+        records = util.RecordList(
+            records, util._records_version(records, fingerprints), fingerprints
+        )
+        engine = search.WhooshSearchEngine(use_memory=True)
+        engine.build_index(records)
+        _, build_seconds = timed(engine._facets_for, records)
+        print(f"{size:>8} (facet index built in {build_seconds * 1000:.0f} ms)")
+
+        paths = [
+            ("scan every record", lambda: scan_facets(records, filters)),
+            (
+                "facet index, page 1 + counts",
+                lambda: engine.search_ids(
+                    "", records, page_size=24, filters=filters, facets=True
+                ),
+            ),
+            (
+                'facet index + "tag3" query',
+                lambda: engine.search_ids(
+                    "tag3", records, page_size=24, filters=filters, facets=True
+                ),
+            ),
+        ]
+        for label, func in paths:
+            func()  # Warm up the searcher and the docnum map
+            result, elapsed = timed(func)
+            hits = len(result[0]) if isinstance(result, tuple) else result["total"]
+            print(f"{size:>8} {label:<32} {hits:>7} {elapsed * 1000:>10.1f}")
+
+
+def bench_results(args):
+    records = [
+        util.build_record(
+            "code", "autonomous", f"entry-{i:06d}", make_info_json("code", i)
+        )
+        for i in range(args.entries)
+    ]
+    fingerprints = {
+        record["uuid"]: hashlib.sha1(record["uuid"].encode()).hexdigest()
+        for record in records
+    }
+    records = util.RecordList(
+        records, util._records_version(records, fingerprints), fingerprints
+    )
+
+    # A skewed workload: a few popular queries make up most of the traffic
+    queries = ["tag1", "synthetic", "tag3", "entry", "author", "testing", "local"]
+    weights = [40, 20, 15, 10, 8, 5, 2]
+    rng = random.Random(0)
+    workload = [
+        (rng.choices(queries, weights)[0], rng.choice([None, {"language": ["Java"]}]))
+        for _ in range(args.searches)
+    ]
+
+    print(f"{args.entries} records, {args.searches} searches of 24 hits")
+    print(f"{'path':<24} {'total s':>8} {'avg ms':>8} {'hit ratio':>10}")
+    for label, cache in [
+        ("no result cache", QueryCache(max_entries=0)),
+        ("result cache", QueryCache()),
+    ]:
+        search._result_cache = cache
+        search.force_index_rebuild()
+        search.search_ids("", records, "code", "autonomous")  # Build the index
+
+        start = time.perf_counter()
+        for query, filters in workload:
+            search.search_ids(
+                query, records, "code", "autonomous", page_size=24, filters=filters
+            )
+        elapsed = time.perf_counter() - start
+        ratio = cache.stats()["hit_ratio"]
+        print(
+            f"{label:<24} {elapsed:>8.2f} {elapsed * 1000 / args.searches:>8.2f} "
+            f"{'-' if ratio is None else ratio:>10}"
+        )
+
+    # A new version of the records moves the index to a new generation
+    changed = util.RecordList(list(records), "changed", fingerprints)
+    search.search_ids("tag1", changed, "code", "autonomous", page_size=24)
+    print(f"after a records change: {cache.stats()}")
+
+
+def bench_suggest(args):
+    records = [
+        util.build_record(
+            "code", "autonomous", f"entry-{i:06d}", make_info_json("code", i)
+        )
+        for i in range(args.entries)
+    ]
+    fingerprints = {
+        record["uuid"]: hashlib.sha1(record["uuid"].encode()).hexdigest()
+        for record in records
+    }
+    records = util.RecordList(
+        records, util._records_version(records, fingerprints), fingerprints
+    )
+    search.force_index_rebuild()
+    search.build_index(records, "code", "autonomous")
+    engine = search._registry.get("code", "autonomous")
+    _, build_seconds = timed(engine.prefix_index)
+    print(
+        f"{args.entries} records, {len(engine.prefix_index())} prefix keys "
+        f"built in {build_seconds * 1000:.0f} ms"
+    )
+
+    # What a user typing "synthetic code" sends, one request per keystroke
+    typed = "synthetic code"
+    prefixes = [typed[:length] for length in range(1, len(typed) + 1)]
+    lookups = [prefixes[i % len(prefixes)] for i in range(args.lookups)]
+
+    print(f"{'path':<28} {'lookups':>8} {'avg ms':>8} {'max ms':>8}")
+    for label, func in [
+        (
+            "corrector per call",
+            lambda prefix: search.get_search_suggestions(
+                prefix, records, "code", "autonomous"
+            ),
+        ),
+        (
+            "prefix dictionary",
+            lambda prefix: search.suggest(prefix, "code", "autonomous"),
+        ),
+    ]:
+        # The corrector is slow enough that a sample shows the difference
+        count = len(lookups) if label == "prefix dictionary" else len(prefixes)
+        times = [timed(func, prefix)[1] for prefix in lookups[:count]]
+        print(
+            f"{label:<28} {count:>8} {sum(times) * 1000 / count:>8.3f} "
+            f"{max(times) * 1000:>8.3f}"
+        )
+    print(f"suggestions for 'tag': {search.suggest('tag', 'code', 'autonomous')}")
+
+
+def bench_global(args):
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import app
+    import refresh
+
+    files = generate_vault(args.entries)
+    categories = [
+        (base, category) for base, names in util.SECTIONS.items() for category in names
+    ]
+    query = str(10000 + args.entries // 2)  # One team's entries in every category
+
+    def wait_for_refreshes():
+        for pending in list(refresh._in_flight.values()):
+            pending.done.result()
+
+    def per_category():
+        total = 0
+        for base, category in categories:
+            client.get(f"/{base}/{category}")
+            found = client.post("/api/search", json={"query": query}).get_json()
+            total += found["total"]
+        return total
+
+    def vault_wide():
+        found = client.post("/api/search", json={"global": True, "query": query})
+        return found.get_json()["total"]
+
+    with FakeGitHub(files, latency=args.latency) as server:
+        point_util_at(server)
+        client = app.app.test_client()
+        client.get("/")
+
+        print(
+            f"{len(categories)} categories of {args.entries} entries, query {query!r}"
+        )
+        print(f"{'path':<28} {'hits':>5} {'cold s':>8} {'warm ms':>8} {'requests':>9}")
+        for label, run in [
+            ("visit every category", per_category),
+            ("one global search", vault_wide),
+        ]:
+            util.clear_record_cache()
+            search.force_index_rebuild()
+            server.calls.clear()
+            hits, cold = timed(run)
+            wait_for_refreshes()
+            requests = len(server.calls)
+            _, warm = timed(run)
+            print(
+                f"{label:<28} {hits:>5} {cold:>8.2f} {warm * 1000:>8.1f} {requests:>9}"
+            )
+
+        # Expire the records and change one entry upstream; the global index
+        # picks up the change without re-indexing the rest of the vault
+        for key in list(util._record_cache):
+            util._record_cache[key]["fetched_at"] = float("-inf")
+        path = "ftc/code/vision/entry-00000/info.json"
+        server.files[path] = server.files[path].replace(b"entry", b"Entry")
+        vault_wide()
+        wait_for_refreshes()
+        _, elapsed = timed(vault_wide)
+        stats = search._global_index_stats()
+        print(
+            f"after one upstream change: {elapsed * 1000:.1f} ms, "
+            f"builds={stats['index_builds']} updates={stats['index_updates']} "
+            f"last_update={stats['last_update']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenVault performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fetch_parser = subparsers.add_parser(
+        "fetch", help="Sequential vs concurrent info.json fetching"
+    )
+    fetch_parser.add_argument("--entries", type=int, default=100)
+    fetch_parser.add_argument("--latency", type=float, default=0.02)
+    fetch_parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    fetch_parser.set_defaults(func=bench_fetch)
+
+    cache_parser = subparsers.add_parser(
+        "cache", help="Record cache hits and ETag revalidation"
+    )
+    cache_parser.add_argument("--entries", type=int, default=100)
+    cache_parser.add_argument("--latency", type=float, default=0.02)
+    cache_parser.set_defaults(func=bench_cache)
+
+    rebuilds_parser = subparsers.add_parser(
+        "rebuilds", help="Search index rebuilds caused by record identity"
+    )
+    rebuilds_parser.add_argument("--entries", type=int, default=100)
+    rebuilds_parser.add_argument("--searches", type=int, default=1000)
+    rebuilds_parser.set_defaults(func=bench_rebuilds)
+
+    coldstart_parser = subparsers.add_parser(
+        "coldstart", help="Time to first search with and without a prebuilt index"
+    )
+    coldstart_parser.add_argument("--entries", type=int, default=100)
+    coldstart_parser.add_argument("--latency", type=float, default=0.02)
+    coldstart_parser.set_defaults(func=bench_coldstart)
+
+    query_parser = subparsers.add_parser(
+        "query", help="Search result assembly scaling with record count"
+    )
+    query_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    query_parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=10000,
+        help="Largest size to also time the old quadratic assembly at",
+    )
+    query_parser.set_defaults(func=bench_query)
+
+    changes_parser = subparsers.add_parser(
+        "changes", help="Cost of detecting whether records changed"
+    )
+    changes_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    changes_parser.add_argument("--repeat", type=int, default=5)
+    changes_parser.set_defaults(func=bench_changes)
+
+    submit_parser = subparsers.add_parser(
+        "submit", help="Contribute-form submission against the fake GitHub API"
+    )
+    submit_parser.add_argument("--latency", type=float, default=0.05)
+    submit_parser.add_argument("--upload-kb", type=int, default=512)
+    submit_parser.set_defaults(func=bench_submit)
+
+    upload_parser = subparsers.add_parser(
+        "upload", help="Peak memory of blob uploads by file size"
+    )
+    upload_parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+    upload_parser.set_defaults(func=bench_upload)
+
+    crawl_parser = subparsers.add_parser(
+        "crawl", help="Full-vault info.json crawl used by migrations"
+    )
+    crawl_parser.add_argument("--entries", type=int, default=50)
+    crawl_parser.add_argument("--latency", type=float, default=0.02)
+    crawl_parser.add_argument("--workers", type=int, default=16)
+    crawl_parser.set_defaults(func=bench_crawl)
+
+    mirror_parser = subparsers.add_parser(
+        "mirror", help="Local mirror sync and reads vs GitHub"
+    )
+    mirror_parser.add_argument("--entries", type=int, default=100)
+    mirror_parser.add_argument("--latency", type=float, default=0.02)
+    mirror_parser.add_argument("--repeat", type=int, default=1000)
+    mirror_parser.set_defaults(func=bench_mirror)
+
+    stale_parser = subparsers.add_parser(
+        "stale",
+        help="Page latency after TTL expiry with and without background refresh",
+    )
+    stale_parser.add_argument("--entries", type=int, default=100)
+    stale_parser.add_argument("--latency", type=float, default=0.02)
+    stale_parser.set_defaults(func=bench_stale)
+
+    coalesce_parser = subparsers.add_parser(
+        "coalesce", help="Concurrent identical category fetches"
+    )
+    coalesce_parser.add_argument("--entries", type=int, default=100)
+    coalesce_parser.add_argument("--latency", type=float, default=0.02)
+    coalesce_parser.add_argument("--concurrency", type=int, default=20)
+    coalesce_parser.set_defaults(func=bench_coalesce)
+
+    ratelimit_parser = subparsers.add_parser(
+        "ratelimit", help="Retries and throttling of the shared GitHub client"
+    )
+    ratelimit_parser.add_argument("--entries", type=int, default=100)
+    ratelimit_parser.add_argument("--latency", type=float, default=0.01)
+    ratelimit_parser.add_argument(
+        "--errors", type=int, default=1, help="Extra 500s injected after the burst"
+    )
+    ratelimit_parser.add_argument("--requests", type=int, default=150)
+    ratelimit_parser.add_argument("--rate-limit", type=int, default=100)
+    ratelimit_parser.add_argument("--window", type=float, default=5)
+    ratelimit_parser.set_defaults(func=bench_ratelimit)
+
+    pages_parser = subparsers.add_parser(
+        "pages", help="Category page size and render time with pagination"
+    )
+    pages_parser.add_argument("--entries", type=int, default=1000)
+    pages_parser.add_argument("--page-size", type=int, default=24)
+    pages_parser.add_argument("--repeat", type=int, default=5)
+    pages_parser.set_defaults(func=bench_pages)
+
+    restart_parser = subparsers.add_parser(
+        "restart", help="Vault reload after a restart with and without the blob cache"
+    )
+    restart_parser.add_argument("--entries", type=int, default=50)
+    restart_parser.add_argument("--latency", type=float, default=0.02)
+    restart_parser.set_defaults(func=bench_restart)
+
+    facets_parser = subparsers.add_parser(
+        "facets", help="Facet filtering and counts by record count"
+    )
+    facets_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    facets_parser.set_defaults(func=bench_facets)
+
+    results_parser = subparsers.add_parser(
+        "results", help="Repeated searches with and without the result cache"
+    )
+    results_parser.add_argument("--entries", type=int, default=10000)
+    results_parser.add_argument("--searches", type=int, default=1000)
+    results_parser.set_defaults(func=bench_results)
+
+    suggest_parser = subparsers.add_parser(
+        "suggest", help="Type-ahead lookups per keystroke"
+    )
+    suggest_parser.add_argument("--entries", type=int, default=10000)
+    suggest_parser.add_argument("--lookups", type=int, default=1000)
+    suggest_parser.set_defaults(func=bench_suggest)
+
+    global_parser = subparsers.add_parser(
+        "global", help="Vault-wide search vs searching each category page"
+    )
+    global_parser.add_argument("--entries", type=int, default=50)
+    global_parser.add_argument("--latency", type=float, default=0.02)
+    global_parser.set_defaults(func=bench_global)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Content-addressed cache of parsed info.json payloads.
+
+The GitHub contents listing of a category includes the git tree SHA of every
+entry directory, which changes whenever anything in the entry does. util.py
+stores each parsed info.json here under that SHA, so after a restart only
+entries whose SHA changed are downloaded again and a warm start of a category
+costs the listing call alone. Payloads rather than finished records are kept,
+so changes to build_record() never serve outdated records.
+
+The cache is a SQLite file that survives restarts and can be shared by worker
+processes. Once it grows past BLOB_CACHE_MAX_MB, the least recently used
+payloads are evicted.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sqlite_db import connect
+
+BLOB_CACHE_PATH = os.getenv(
+    "BLOB_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "openvault-blob-cache.sqlite3"),
+)
+# Size budget for cached payloads in MB ("0" disables the cache)
+BLOB_CACHE_MAX_MB = float(os.getenv("BLOB_CACHE_MAX_MB", "64"))
+
+# Eviction frees space down to this fraction of the budget, so it runs rarely
+_LOW_WATER = 0.9
+# Stay below SQLite's limit on bound parameters per statement
+_BATCH = 500
+
+
+class BlobCache:
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "evictions": 0}
+        with connect(self.path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL, size INTEGER NOT NULL, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS blobs_used_at ON blobs (used_at)")
+
+    def _count(self, counter, amount):
+        with self._lock:
+            self._stats[counter] += amount
+
+    def get_many(self, shas):
+        """Cached payloads for the given SHAs, as {sha: payload}; misses are left out"""
+        shas = [sha for sha in set(shas) if sha]
+        found = {}
+        now = time.time()
+        with connect(self.path) as conn:
+            for start in range(0, len(shas), _BATCH):
+                batch = shas[start : start + _BATCH]
+                placeholders = ", ".join("?" for _ in batch)
+                rows = conn.execute(
+                    f"SELECT sha, data FROM blobs WHERE sha IN ({placeholders})", batch
+                ).fetchall()
+                for sha, data in rows:
+                    found[sha] = json.loads(data)
+                if rows:
+                    conn.execute(
+                        f"UPDATE blobs SET used_at = ? WHERE sha IN ({placeholders})",
+                        (now, *batch),
+                    )
+        self._count("hits", len(found))
+        self._count("misses", len(shas) - len(found))
+        return found
+
+    def put_many(self, payloads):
+        """Store {sha: payload} and evict old payloads if over the size budget"""
+        if not payloads:
+            return
+        now = time.time()
+        rows = []
+        for sha, payload in payloads.items():
+            data = json.dumps(payload)
+            rows.append((sha, data, len(data.encode()), now))
+
+        with connect(self.path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO blobs (sha, data, size, used_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._count("stored", len(rows))
+
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            if total <= self.max_bytes:
+                return
+
+            # Oldest first until the cache is back under the low-water mark
+            evict = []
+            for sha, size in conn.execute(
+                "SELECT sha, size FROM blobs ORDER BY used_at"
+            ).fetchall():
+                if total <= self.max_bytes * _LOW_WATER:
+                    break
+                evict.append((sha,))
+                total -= size
+            conn.executemany("DELETE FROM blobs WHERE sha = ?", evict)
+            self._count("evictions", len(evict))
+
+    def clear(self):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM blobs")
+
+    def stats(self):
+        with connect(self.path) as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(entries=entries, bytes=size, max_bytes=self.max_bytes)
+        return stats
+
+
+def _create_cache():
+    if BLOB_CACHE_MAX_MB <= 0:
+        return None
+    return BlobCache(BLOB_CACHE_PATH, int(BLOB_CACHE_MAX_MB * 1024 * 1024))
+
+
+blob_cache = _create_cache()
@@ -0,0 +1,68 @@
+"""
+Offline build of the prebuilt search index shipped with each deployment.
+
+Fetches every category from OpenVaultFiles, builds its Whoosh index, and writes
+the indexes together with the records and their GitHub ETags. At startup the
+app opens these indexes read-only and only applies what changed since the build,
+so a cold instance does not have to crawl GitHub before its first search.
+
+Usage:
+    python build_search_index.py [--output=search_index] [--section=<name>]
+
+Examples:
+    # Build every category before deploying
+    python build_search_index.py
+
+    # Build only the code categories into a custom directory
+    python build_search_index.py --section=code --output=/tmp/search_index
+"""
+
+import argparse
+import shutil
+import time
+
+from dotenv import load_dotenv
+
+import util
+from search import SEARCH_INDEX_DIR, write_index_artifact
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the prebuilt OpenVault search index"
+    )
+    parser.add_argument(
+        "--output",
+        default=SEARCH_INDEX_DIR,
+        help=f"Directory to write the index to (default: {SEARCH_INDEX_DIR})",
+    )
+    parser.add_argument(
+        "--section",
+        action="append",
+        choices=list(util.SECTIONS.keys()),
+        help="Only build these sections (default: all)",
+    )
+    args = parser.parse_args()
+
+    sections = util.SECTIONS
+    if args.section:
+        sections = {name: util.SECTIONS[name] for name in args.section}
+
+    print(f"Building search index in {args.output}...")
+    start = time.perf_counter()
+
+    # Start from an empty directory so removed categories do not linger
+    shutil.rmtree(args.output, ignore_errors=True)
+    manifest = write_index_artifact(args.output, sections)
+
+    documents = sum(info["documents"] for info in manifest["categories"].values())
+    print(
+        f"\n✓ Indexed {documents} records in {len(manifest['categories'])} categories "
+        f"({time.perf_counter() - start:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,147 +1,369 @@
 import base64
+import io
 import json
 import os
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import requests
 from dotenv import load_dotenv
 from flask import render_template
 
+from github_client import github
+from submission_queue import SUBMISSION_DIR, SubmissionStore
+
 load_dotenv()
 
 OWNER = "AlpineRobotics25710"
 REPO = "OpenVaultFiles"
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 BRANCH_NAME = "if-this-is-the-name-that-means-somethings-wrong"
 
 GITHUB_API_URL = f"https://api.github.com/repos/{OWNER}/{REPO}"
 
+# Files in a submission uploaded to GitHub in parallel
+BLOB_UPLOAD_WORKERS = int(os.getenv("BLOB_UPLOAD_WORKERS", "4"))
+
+# Upload size limits in MB, checked before any file is read or sent to GitHub
+MAX_UPLOAD_MB = {
+    "Code": float(os.getenv("MAX_CODE_UPLOAD_MB", "50")),
+    "Portfolios": float(os.getenv("MAX_PORTFOLIO_UPLOAD_MB", "50")),
+}
+MAX_PREVIEW_UPLOAD_MB = float(os.getenv("MAX_PREVIEW_UPLOAD_MB", "10"))
+
+# Largest request body Flask accepts: the biggest upload, a preview and the form
+MAX_REQUEST_BYTES = int(
+    (max(MAX_UPLOAD_MB.values()) + MAX_PREVIEW_UPLOAD_MB + 1) * 1024 * 1024
+)
+
+# Uploads are base64-encoded this many bytes at a time (a multiple of 3)
+UPLOAD_CHUNK_SIZE = 3 * 64 * 1024
+
+# Encoded blobs stay in memory up to this size before spilling to disk
+BLOB_SPOOL_SIZE = 1024 * 1024
+
+# Background threads doing the GitHub work for queued submissions
+SUBMISSION_WORKERS = int(os.getenv("SUBMISSION_WORKERS", "2"))
+
+# Attempts per submission before it is marked failed, and the first retry delay
+SUBMISSION_MAX_ATTEMPTS = int(os.getenv("SUBMISSION_MAX_ATTEMPTS", "3"))
+SUBMISSION_RETRY_DELAY = float(os.getenv("SUBMISSION_RETRY_DELAY", "2"))
+
+# "inline" does the GitHub work within the /submit-pr request instead, for
+# serverless hosts that freeze background threads between requests (Vercel)
+SUBMISSION_MODE = os.getenv(
+    "SUBMISSION_MODE", "inline" if os.getenv("VERCEL") else "background"
+)
+
+# Seconds between checks for submissions whose worker died ("0" disables them)
+SUBMISSION_SWEEP_SECONDS = float(os.getenv("SUBMISSION_SWEEP_SECONDS", "60"))
+
+submission_store = SubmissionStore(SUBMISSION_DIR)
+_submission_executor = ThreadPoolExecutor(
+    max_workers=SUBMISSION_WORKERS, thread_name_prefix="submission"
+)
+# Distinguishes this process's claims on jobs from those of other processes
+_worker_token = uuid.uuid4().hex[:8]
+
+
+def _worker_id():
+    # The pid is read per call so forked workers do not share an identity
+    return f"{socket.gethostname()}:{os.getpid()}:{_worker_token}"
+
 
 def process_submit_pr(request):
-    """Handles form submission and creates a PR."""
+    """
+    Validates the form and queues the submission for the background worker,
+    or submits it before responding in inline mode.
+    """
 
     form_data = extract_form_data(request)
     if not validate_required_fields(form_data):
         return render_error("Missing required fields")
 
+    size_error = check_upload_sizes(request, form_data)
+    if size_error:
+        return render_error(size_error)
+
     branch_name = generate_branch_name(form_data["team_number"], form_data["title"])
-    create_branch_response = create_branch(branch_name)
-    if "error" in create_branch_response:
-        return render_error(create_branch_response)
 
+    files = []
     preview_file = request.files.get("previewImage")
     if preview_file:
-        file_response = upload_preview_image(preview_file, form_data, branch_name)
-        if "error" in file_response:
-            return render_error(file_response)
+        files.append(prepare_preview_image(preview_file, form_data, branch_name))
 
-    upload_file_response = upload_main_file(request, form_data, branch_name)
-    if upload_file_response and "error" in upload_file_response:
-        return render_error(upload_file_response)
+    main_file = prepare_main_file(request, form_data, branch_name)
+    if main_file:
+        files.append(main_file)
 
-    info_response = upload_info_json(request, form_data, branch_name)
-    if "error" in info_response:
-        return render_error(info_response)
+    files.append(prepare_info_json(request, form_data, branch_name))
 
     pr_title, pr_body = generate_pr_details(form_data)
-    pr_response = create_pull_request(pr_title, pr_body, branch_name)
-
-    if pr_response:
-        return render_template("ftc/contribute.html", submitted=True)
+    submission_id = submission_store.create(
+        {
+            "branch_name": branch_name,
+            "message": f"Add {form_data['title']} from team {form_data['team_number']}",
+            "pr_title": pr_title,
+            "pr_body": pr_body,
+        },
+        files,
+    )
+    if SUBMISSION_MODE == "inline":
+        run_submission(submission_id)
     else:
-        return render_error(pr_response)
-
+        _submission_executor.submit(run_submission, submission_id)
 
-def create_branch(branch_name, base_branch="main"):
-    """Creates a new branch from main (or another base branch)."""
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    print(GITHUB_TOKEN)
-
-    # Get latest commit SHA of the base branch
-    base_branch_info = requests.get(
-        f"{GITHUB_API_URL}/git/ref/heads/{base_branch}", headers=headers
+    return render_template(
+        "ftc/contribute.html", submitted=True, submission_id=submission_id
     )
-    if base_branch_info.status_code != 200:
-        return {
-            "error": "Failed to get base branch info",
-            "details": base_branch_info.json(),
-        }
 
-    base_sha = base_branch_info.json()["object"]["sha"]
 
-    # Create a new branch
-    branch_ref = f"refs/heads/{branch_name}"
-    create_branch_response = requests.post(
-        f"{GITHUB_API_URL}/git/refs",
-        headers=headers,
-        json={"ref": branch_ref, "sha": base_sha},
+def run_submission(submission_id):
+    """Does the GitHub work for a queued submission, retrying failed attempts."""
+    owner = _worker_id()
+    # Another worker may have finished the job or still hold it
+    if not submission_store.claim(submission_id, owner):
+        return
+    job = submission_store.get(submission_id)
+
+    while True:
+        job["attempts"] += 1
+        if not submission_store.update(
+            submission_id, owner, status="running", attempts=job["attempts"]
+        ):
+            return
+
+        try:
+            error = _submit_to_github(job, owner)
+        except Exception as e:
+            error = {"error": "Submission failed", "details": str(e)}
+
+        if error is None:
+            if submission_store.update(
+                submission_id, owner, status="submitted", step=None, error=None
+            ):
+                submission_store.remove_files(submission_id)
+            return
+
+        if job["attempts"] >= SUBMISSION_MAX_ATTEMPTS:
+            print(f"Submission {submission_id} failed: {error}")
+            submission_store.update(
+                submission_id, owner, status="failed", error=str(error)
+            )
+            return
+
+        if not submission_store.update(
+            submission_id, owner, status="retrying", error=str(error)
+        ):
+            return
+        time.sleep(SUBMISSION_RETRY_DELAY * 2 ** (job["attempts"] - 1))
+
+
+def _submit_to_github(job, owner):
+    """Commits the job's files and opens its PR, skipping steps already done"""
+    submission_id = job["id"]
+    payload = job["payload"]
+
+    if not job["commit_sha"]:
+        submission_store.update(submission_id, owner, step="committing")
+        files = submission_store.open_files(job)
+        try:
+            commit_response = commit_files(
+                files, payload["branch_name"], payload["message"]
+            )
+        finally:
+            for file in files:
+                file["body"].close()
+        if "error" in commit_response:
+            return commit_response
+
+        job["commit_sha"] = commit_response["commit_sha"]
+        submission_store.update(submission_id, owner, commit_sha=job["commit_sha"])
+
+    submission_store.update(submission_id, owner, step="opening_pr")
+    pr_response = create_pull_request(
+        payload["pr_title"], payload["pr_body"], payload["branch_name"]
     )
+    if "error" in pr_response:
+        return pr_response
+
+    submission_store.update(submission_id, owner, pr_url=pr_response["html_url"])
+    return None
+
+
+def resume_submissions():
+    """
+    Queues submissions left unfinished by a previous process. Jobs still leased
+    to a live worker fail to be claimed and are left to it.
+    """
+    if SUBMISSION_MODE == "inline":
+        # No background threads to run them; they would block the first request
+        return
+    for submission_id in submission_store.pending():
+        _submission_executor.submit(run_submission, submission_id)
+    if SUBMISSION_SWEEP_SECONDS > 0:
+        threading.Thread(
+            target=_sweep_submissions, name="submission-sweep", daemon=True
+        ).start()
+
+
+def _sweep_submissions():
+    """
+    Re-queues stalled submissions for as long as the process runs. Jobs still
+    leased when resume_submissions ran, such as those of a worker that was
+    killed moments before, are picked up here once the lease expires.
+    """
+    while True:
+        time.sleep(SUBMISSION_SWEEP_SECONDS)
+        try:
+            for submission_id in submission_store.stalled():
+                _submission_executor.submit(run_submission, submission_id)
+        except Exception as e:
+            print(f"Submission sweep failed: {e}")
+
+
+def get_submission_status(submission_id):
+    """Public progress of a submission, or None if it does not exist"""
+    job = submission_store.get(submission_id)
+    if job is None:
+        return None
 
-    if create_branch_response.status_code != 201:
-        return {
-            "error": "Failed to create branch",
-            "details": create_branch_response.json(),
-        }
-
-    return {"message": "Branch created successfully", "branch_name": branch_name}
-
-
-def get_file_sha(filename, branch_name):
-    """Gets the SHA of an existing file (if it exists) to update it."""
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    file_url = f"{GITHUB_API_URL}/contents/{filename}?ref={branch_name}"
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "step": job["step"],
+        "attempts": job["attempts"],
+        "pr_url": job["pr_url"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
 
-    response = requests.get(file_url, headers=headers)
 
-    if response.status_code == 200:
-        return response.json().get("sha")  # Return SHA if file exists
-    return None  # Return None if file does not exist
+def encode_blob(stream):
+    """
+    Writes the git blob request body for a file to a spooled temporary file.
+
+    The file is read and base64-encoded in chunks, so memory use stays around
+    UPLOAD_CHUNK_SIZE instead of the whole file plus its encoding.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=BLOB_SPOOL_SIZE)
+    body.write(b'{"encoding": "base64", "content": "')
+
+    leftover = b""
+    while True:
+        chunk = stream.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        # Only encode whole 3-byte groups so the chunks join without padding
+        chunk = leftover + chunk
+        cut = len(chunk) - len(chunk) % 3
+        body.write(base64.b64encode(chunk[:cut]))
+        leftover = chunk[cut:]
+
+    body.write(base64.b64encode(leftover))
+    body.write(b'"}')
+    body.seek(0)
+    return body
+
+
+def create_blob(body):
+    """Uploads an encoded blob body as a git blob and returns its SHA (or an error dict)."""
+    with body:
+        blob_response = github.post(
+            f"{GITHUB_API_URL}/git/blobs",
+            headers={"Content-Type": "application/json"},
+            data=body,
+        )
 
+    if blob_response.status_code != 201:
+        return {"error": "Failed to upload file", "details": blob_response.json()}
+
+    return blob_response.json()["sha"]
+
+
+def commit_files(files, branch_name, message, base_branch="main"):
+    """
+    Creates a new branch holding a single commit that adds all files.
+
+    files is a list of {"path", "body"} dicts from encode_blob. The blobs
+    are uploaded concurrently, then one tree and one commit are created on top
+    of the base branch and the new branch ref is pointed at that commit.
+    """
+    # Latest commit and tree of the base branch in one call
+    base_info = github.get(f"{GITHUB_API_URL}/branches/{base_branch}")
+    if base_info.status_code != 200:
+        return {"error": "Failed to get base branch info", "details": base_info.json()}
+
+    base_commit = base_info.json()["commit"]
+    base_sha = base_commit["sha"]
+    base_tree = base_commit["commit"]["tree"]["sha"]
+
+    with ThreadPoolExecutor(max_workers=BLOB_UPLOAD_WORKERS) as executor:
+        blob_shas = list(executor.map(lambda f: create_blob(f["body"]), files))
+
+    for file, blob_sha in zip(files, blob_shas):
+        if isinstance(blob_sha, dict):
+            blob_sha["filename"] = file["path"]
+            return blob_sha
+
+    tree_response = github.post(
+        f"{GITHUB_API_URL}/git/trees",
+        json={
+            "base_tree": base_tree,
+            "tree": [
+                {"path": file["path"], "mode": "100644", "type": "blob", "sha": sha}
+                for file, sha in zip(files, blob_shas)
+            ],
+        },
+    )
+    if tree_response.status_code != 201:
+        return {"error": "Failed to create tree", "details": tree_response.json()}
+
+    commit_response = github.post(
+        f"{GITHUB_API_URL}/git/commits",
+        json={
+            "message": message,
+            "tree": tree_response.json()["sha"],
+            "parents": [base_sha],
+        },
+    )
+    if commit_response.status_code != 201:
+        return {"error": "Failed to create commit", "details": commit_response.json()}
 
-def create_file(filename, encoded_content, branch_name):
-    """Creates or updates a file in the repository."""
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    file_url = f"{GITHUB_API_URL}/contents/{filename}"
+    commit_sha = commit_response.json()["sha"]
 
-    # Get SHA if file exists
-    sha = get_file_sha(filename, branch_name)
+    # Create the branch directly at the new commit
+    branch_response = github.post(
+        f"{GITHUB_API_URL}/git/refs",
+        json={"ref": f"refs/heads/{branch_name}", "sha": commit_sha},
+    )
+    if branch_response.status_code != 201:
+        return {"error": "Failed to create branch", "details": branch_response.json()}
 
-    data = {
-        "message": f"Add or update {filename}",
-        "content": encoded_content,
-        "branch": branch_name,
+    return {
+        "message": "Files committed successfully",
+        "branch_name": branch_name,
+        "commit_sha": commit_sha,
     }
 
-    if sha:
-        data["sha"] = sha  # Required for updating an existing file
-
-    create_file_response = requests.put(file_url, headers=headers, json=data)
-
-    if create_file_response.status_code not in [200, 201]:
-        return {
-            "error": "Failed to create file",
-            "details": create_file_response.json(),
-            "filename": filename,
-        }
-
-    return {"message": "File created successfully", "filename": filename}
-
 
 def create_pull_request(title, body, branch_name, base="main"):
-    """Creates a pull request."""
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
+    """Creates a pull request and returns it (or an error dict)."""
     pr_url = f"{GITHUB_API_URL}/pulls"
 
-    pr_response = requests.post(
+    pr_response = github.post(
         pr_url,
-        headers=headers,
         json={"title": title, "body": body, "head": branch_name, "base": base},
     )
 
     if pr_response.status_code != 201:
         return {"error": "Failed to create PR", "details": pr_response.json()}
 
-    return True
+    return pr_response.json()
 
 
 def extract_form_data(req):
@@ -178,7 +400,33 @@ def render_error(error_message):
     )
 
 
-def upload_preview_image(preview_file, data, branch_name):
+def _upload_size(file):
+    """Size in bytes of an uploaded file, without reading it"""
+    stream = file.stream
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+
+def check_upload_sizes(req, data):
+    """Returns an error message if an uploaded file is over its size limit."""
+    limits = [("previewImage", MAX_PREVIEW_UPLOAD_MB)]
+    if data["category"] == "Code":
+        limits.append(("codeUpload", MAX_UPLOAD_MB["Code"]))
+    elif data["category"] == "Portfolios":
+        limits.append(("portfolioUpload", MAX_UPLOAD_MB["Portfolios"]))
+
+    for field, limit_mb in limits:
+        file = req.files.get(field)
+        if file and _upload_size(file) > limit_mb * 1024 * 1024:
+            return f"{file.filename} is larger than the {limit_mb:g} MB limit"
+
+    return None
+
+
+def prepare_preview_image(preview_file, data, branch_name):
     category = data["category"]
     subcategory = (
         data["code_subcategory"] if category == "Code" else data["cad_subcategory"]
@@ -192,13 +440,10 @@ def upload_preview_image(preview_file, data, branch_name):
         path = f"ftc/cad/{subcategory}/{branch_name}"
 
     preview_filename = f"{path}/{preview_file.filename}"
-    content = preview_file.read()
-    return create_file(
-        preview_filename, base64.b64encode(content).decode("utf-8"), branch_name
-    )
+    return {"path": preview_filename, "body": encode_blob(preview_file.stream)}
 
 
-def upload_main_file(req, data, branch_name):
+def prepare_main_file(req, data, branch_name):
     category = data["category"]
     file = None
     filename = None
@@ -219,13 +464,10 @@ def upload_main_file(req, data, branch_name):
             filename = f"ftc/portfolios/portfolios/{branch_name}/{file.filename}"
 
     if file and filename:
-        content = file.read()
-        return create_file(
-            filename, base64.b64encode(content).decode("utf-8"), branch_name
-        )
+        return {"path": filename, "body": encode_blob(file.stream)}
 
 
-def upload_info_json(req, data, branch_name):
+def prepare_info_json(req, data, branch_name):
     preview_file = req.files.get("previewImage")
     category = data["category"]
 
@@ -287,10 +529,8 @@ def upload_info_json(req, data, branch_name):
         )
         path = f"ftc/cad/{data['cad_subcategory']}/{branch_name}/info.json"
 
-    encoded = base64.b64encode(json.dumps(info_data, indent=4).encode("utf-8")).decode(
-        "utf-8"
-    )
-    return create_file(path, encoded, branch_name)
+    content = io.BytesIO(json.dumps(info_data, indent=4).encode("utf-8"))
+    return {"path": path, "body": encode_blob(content)}
 
 
 def generate_pr_details(data):
@@ -0,0 +1,144 @@
+"""
+Facet index for filtering a category's records by season, tag, language and
+whether they were used in competition.
+
+Each facet value has a posting list of the records that carry it, stored as a
+bitmap (a Python int with bit i set for the record at position i). Filtering
+and counting are then a few AND operations and popcounts per request, however
+many cards the category has. WhooshSearchEngine keeps one FacetIndex per
+version of a category's records, next to its Whoosh index.
+
+Filters are {facet: [values]}: values of one facet are ORed, facets are ANDed.
+The vault-wide index also filters by GLOBAL_FACETS, which add each record's
+base and category.
+"""
+
+# How each facet's values are read from a record
+FACETS = {
+    "season": lambda record: record.get("seasons_used") or [],
+    "tag": lambda record: record.get("tags") or [],
+    "language": lambda record: [record["language"]] if record.get("language") else [],
+    "used_in_comp": lambda record: (
+        [str(record["used_in_comp"]).lower()] if "used_in_comp" in record else []
+    ),
+}
+
+# FACETS plus where each record lives, for the index covering every category.
+# Categories are named "base/category", the same as on category pages' URLs.
+GLOBAL_FACETS = {
+    **FACETS,
+    "base": lambda record: [record["base"]] if record.get("base") else [],
+    "category": lambda record: (
+        [f"{record['base']}/{record['category']}"] if record.get("category") else []
+    ),
+}
+
+
+def normalize_filters(filters, facets=FACETS):
+    """
+    Validate filters from a request and return them as {facet: [values]}.
+
+    A single value may be given instead of a list. Raises ValueError for
+    unknown facets or values that are not strings, numbers or booleans.
+    """
+    if not filters:
+        return {}
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object of facet names to values")
+
+    normalized = {}
+    for facet, values in filters.items():
+        if facet not in facets:
+            raise ValueError(
+                f"Unknown filter {facet!r}; expected one of {', '.join(facets)}"
+            )
+        if not isinstance(values, list):
+            values = [values]
+        for value in values:
+            if not isinstance(value, (str, int, float, bool)):
+                raise ValueError(f"Invalid value for filter {facet!r}")
+        values = [_normalize_value(facet, value) for value in values]
+        if values:
+            normalized[facet] = values
+    return normalized
+
+
+def _normalize_value(facet, value):
+    if facet == "used_in_comp":
+        return str(value).lower()
+    return str(value).strip()
+
+
+class FacetIndex:
+    def __init__(self, records, facets=FACETS):
+        self.size = len(records)
+        self.all = (1 << self.size) - 1
+
+        # Collect positions first; setting bits one by one on a growing int
+        # would copy the whole bitmap for every record
+        positions = {facet: {} for facet in facets}
+        for position, record in enumerate(records):
+            for facet, values_of in facets.items():
+                for value in values_of(record):
+                    value = _normalize_value(facet, value)
+                    if value:
+                        positions[facet].setdefault(value, []).append(position)
+
+        self.postings = {
+            facet: {value: self.mask(found) for value, found in values.items()}
+            for facet, values in positions.items()
+        }
+
+    def mask(self, positions):
+        """Bitmap with a bit set for each of the given record positions"""
+        bits = bytearray((self.size + 7) // 8)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, "little")
+
+    def positions(self, mask):
+        """Record positions set in a bitmap, in ascending order"""
+        found = []
+        for byte_index, byte in enumerate(
+            mask.to_bytes((self.size + 7) // 8, "little")
+        ):
+            while byte:
+                low = byte & -byte
+                found.append(byte_index * 8 + low.bit_length() - 1)
+                byte ^= low
+        return found
+
+    def match(self, filters, skip=None):
+        """Bitmap of the records matching every facet in filters except skip"""
+        matched = self.all
+        for facet, values in filters.items():
+            if facet == skip:
+                continue
+            postings = self.postings[facet]
+            either = 0
+            for value in values:
+                either |= postings.get(value, 0)
+            matched &= either
+        return matched
+
+    def counts(self, filters, within=None):
+        """
+        Records per facet value among those matching the other facets' filters.
+
+        Each facet is counted without its own filter applied, so the counts
+        show what selecting another value of that facet would return. within
+        limits the counts to a bitmap of records, such as text search hits.
+        Values are listed most common first.
+        """
+        within = self.all if within is None else within
+        counts = {}
+        for facet, postings in self.postings.items():
+            candidates = self.match(filters, skip=facet) & within
+            facet_counts = {
+                value: (posting & candidates).bit_count()
+                for value, posting in postings.items()
+            }
+            counts[facet] = dict(
+                sorted(facet_counts.items(), key=lambda item: (-item[1], item[0]))
+            )
+        return counts
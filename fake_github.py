@@ -0,0 +1,610 @@
+"""
+Local stand-in for the GitHub API and raw.githubusercontent.com.
+
+Serves an in-memory copy of the OpenVaultFiles tree over HTTP so fetches and
+submissions can be benchmarked and exercised without network access or rate
+limits. Besides the contents API and raw files it implements the parts of the Git
+Data API (blobs, trees, commits, refs) and pull requests that OpenVault uses.
+
+Usage:
+    server = FakeGitHub(generate_vault(entries_per_category=100), latency=0.02)
+    server.start()
+    util.GITHUB_API_BASE = server.api_base
+    util.GITHUB_RAW_ROOT = server.raw_root
+    util.GITHUB_RAW_BASE = server.raw_base
+    ...
+    server.stop()
+"""
+
+import base64
+import hashlib
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from util import SECTIONS
+
+OWNER = "AlpineRobotics25710"
+REPO = "OpenVaultFiles"
+
+
+def blob_sha(content):
+    """Git blob SHA of the given bytes, matching what GitHub reports"""
+    header = f"blob {len(content)}\0".encode()
+    return hashlib.sha1(header + content).hexdigest()
+
+
+def make_info_json(section, index):
+    """Build a realistic info.json payload for a synthetic entry"""
+    season = ["2024-2025", "2023-2024", "2022-2023"][index % 3]
+    info = {
+        "preview-image-name": "preview.png",
+        "title": f"Synthetic {section} entry {index}",
+        "author": f"Author {index % 37}",
+        "description": f"Entry {index} used for local testing of the {section} section.",
+        "team-number": str(10000 + index),
+        "email": "team@example.com",
+        "timestamp": f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d} 12:00:00",
+        "tags": ["synthetic", f"tag{index % 5}"],
+        "seasons-used": [season],
+    }
+    if section == "code":
+        info.update(
+            {
+                "download-name": "code.zip",
+                "github-link": "",
+                "used-in-comp": index % 2 == 0,
+                "language": ["Java", "Kotlin"][index % 2],
+            }
+        )
+    elif section == "cad":
+        info.update(
+            {
+                "used-in-comp": index % 2 == 0,
+                "onshape-link": f"https://cad.onshape.com/documents/{index}",
+            }
+        )
+    elif section == "portfolios":
+        info.update({"file-name": "portfolio.pdf", "awards-won": "Inspire Award"})
+    return info
+
+
+def generate_vault(entries_per_category=100, sections=None):
+    """Return a {path: bytes} mapping shaped like the OpenVaultFiles tree"""
+    files = {}
+    for section, subsections in (sections or SECTIONS).items():
+        for subsection in subsections:
+            for i in range(entries_per_category):
+                path = f"ftc/{section}/{subsection}/entry-{i:05d}/info.json"
+                files[path] = json.dumps(make_info_json(section, i), indent=4).encode()
+            # Every real category contains a placeholder directory
+            files[f"ftc/{section}/{subsection}/filler/.gitkeep"] = b""
+    return files
+
+
+class FakeGitHub:
+    def __init__(self, files=None, latency=0.0, rate_limit=None, rate_limit_window=60):
+        self.files = dict(files or {})  # Working tree of main: path -> bytes
+        self.latency = latency  # Seconds added to every response
+        # API requests allowed per window, like GitHub's primary rate limit
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.rate_remaining = rate_limit
+        self.rate_reset = 0
+        self.injected_errors = []  # (status, retry_after) for the next requests
+        self.request_count = 0
+        self.calls = []  # (method, path) of every request, for counting API usage
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        # Git objects. Trees are stored flattened as {path: blob sha}.
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}  # "heads/<branch>" -> commit sha
+        self.pulls = []
+        self.refs["heads/main"] = self._commit(
+            self._tree_from_files(self.files), [], "Initial commit"
+        )
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self):
+        return f"{self.url}/repos/{OWNER}/{REPO}"
+
+    @property
+    def raw_root(self):
+        """Raw file URLs are {raw_root}/{branch or commit sha}/{path}"""
+        return f"{self.url}/raw/{OWNER}/{REPO}"
+
+    @property
+    def raw_base(self):
+        return f"{self.raw_root}/main"
+
+    def start(self):
+        handler = type("Handler", (_Handler,), {"fake": self})
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def inject_errors(self, *statuses, retry_after=None):
+        """Answer the next requests with these error statuses, in order"""
+        with self._lock:
+            self.injected_errors.extend((status, retry_after) for status in statuses)
+
+    def list_dir(self, path, files=None):
+        """Return GitHub contents-API entries for a directory, or None if missing"""
+        files = self.files if files is None else files
+        prefix = path.rstrip("/") + "/"
+        entries = {}
+        for file_path, content in files.items():
+            if not file_path.startswith(prefix):
+                continue
+            name, _, rest = file_path[len(prefix) :].partition("/")
+            if rest:
+                entries.setdefault(name, {"type": "dir", "sha": ""})
+            else:
+                entries[name] = {"type": "file", "sha": blob_sha(content)}
+
+        if not entries:
+            return None
+
+        tree = {p: blob_sha(c) for p, c in files.items()}
+        listing = []
+        for name in sorted(entries):
+            entry = entries[name]
+            if entry["type"] == "dir":
+                entry["sha"] = self.tree_sha(prefix + name, tree)
+            listing.append(
+                {
+                    "name": name,
+                    "path": prefix + name,
+                    "type": entry["type"],
+                    "sha": entry["sha"],
+                }
+            )
+        return listing
+
+    def tree_sha(self, path, tree=None):
+        """Stable stand-in for a git tree SHA, derived from the blobs below path"""
+        if tree is None:
+            tree = {p: blob_sha(content) for p, content in self.files.items()}
+        prefix = path.rstrip("/") + "/" if path else ""
+        digest = hashlib.sha1()
+        for file_path in sorted(tree):
+            if file_path.startswith(prefix):
+                digest.update(file_path.encode())
+                digest.update(tree[file_path].encode())
+        return digest.hexdigest()
+
+    # ---------- git data ----------
+
+    def _tree_from_files(self, files):
+        tree = {}
+        for path, content in files.items():
+            sha = blob_sha(content)
+            self.blobs[sha] = content
+            tree[path] = sha
+        return self._store_tree(tree)
+
+    def _store_tree(self, tree):
+        sha = self.tree_sha("", tree)
+        self.trees[sha] = dict(tree)
+        return sha
+
+    def _commit(self, tree_sha, parents, message):
+        sha = hashlib.sha1(
+            f"{tree_sha}:{','.join(parents)}:{message}:{len(self.commits)}".encode()
+        ).hexdigest()
+        self.commits[sha] = {"tree": tree_sha, "parents": parents, "message": message}
+        return sha
+
+    def head(self, branch):
+        """Commit sha a branch points at; main follows edits made to self.files"""
+        ref = f"heads/{branch}"
+        if ref not in self.refs:
+            return None
+        if branch == "main":
+            tree = {p: blob_sha(c) for p, c in self.files.items()}
+            current = self.commits[self.refs[ref]]["tree"]
+            if self.tree_sha("", tree) != current:
+                self.refs[ref] = self._commit(
+                    self._tree_from_files(self.files), [self.refs[ref]], "Edit files"
+                )
+        return self.refs[ref]
+
+    def set_head(self, branch, commit_sha):
+        self.refs[f"heads/{branch}"] = commit_sha
+        if branch == "main":
+            tree = self.trees[self.commits[commit_sha]["tree"]]
+            self.files = {path: self.blobs[sha] for path, sha in tree.items()}
+
+    def branch_files(self, branch):
+        """Working tree of any branch as {path: bytes}"""
+        tree = self.trees[self.commits[self.head(branch)]["tree"]]
+        return {path: self.blobs[sha] for path, sha in tree.items()}
+
+    def files_at(self, ref):
+        """Working tree at a branch or commit sha as {path: bytes}, or None"""
+        if ref == "main":
+            return self.files
+        if self.head(ref) is not None:
+            return self.branch_files(ref)
+        if ref in self.commits:
+            tree = self.trees[self.commits[ref]["tree"]]
+            return {path: self.blobs[sha] for path, sha in tree.items()}
+        return None
+
+    def tree_listing(self, tree_sha):
+        """Recursive git tree listing with both tree and blob entries"""
+        tree = self.trees[tree_sha]
+        entries = {}
+        for path, sha in tree.items():
+            parts = path.split("/")
+            for depth in range(1, len(parts)):
+                directory = "/".join(parts[:depth])
+                if directory not in entries:
+                    entries[directory] = {
+                        "path": directory,
+                        "mode": "040000",
+                        "type": "tree",
+                        "sha": self.tree_sha(directory, tree),
+                    }
+            entries[path] = {
+                "path": path,
+                "mode": "100644",
+                "type": "blob",
+                "sha": sha,
+                "size": len(self.blobs[sha]),
+            }
+        return [entries[path] for path in sorted(entries)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    fake = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _send(self, status, body=b"", content_type="application/json", etag=None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        for name, value in getattr(self, "_rate_headers", {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, data, etag=False):
+        body = json.dumps(data).encode()
+        # Mirror GitHub's weak ETags on API responses when requested
+        self._send(status, body, etag=f'W/"{blob_sha(body)}"' if etag else None)
+
+    def _record(self, method):
+        with self.fake._lock:
+            self.fake.request_count += 1
+            self.fake.calls.append((method, urlparse(self.path).path))
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
+
+    def _intercepted(self):
+        """Answer with an injected error or a rate-limit response, if one applies"""
+        fake = self.fake
+        is_api = urlparse(self.path).path.startswith(f"/repos/{OWNER}/{REPO}/")
+        limited = False
+        self._rate_headers = {}
+
+        with fake._lock:
+            injected = fake.injected_errors.pop(0) if fake.injected_errors else None
+            if is_api and fake.rate_limit is not None:
+                now = time.time()
+                if now >= fake.rate_reset:
+                    fake.rate_remaining = fake.rate_limit
+                    fake.rate_reset = math.ceil(now + fake.rate_limit_window)
+                limited = fake.rate_remaining == 0
+                if not limited:
+                    fake.rate_remaining -= 1
+                self._rate_headers = {
+                    "X-RateLimit-Limit": str(fake.rate_limit),
+                    "X-RateLimit-Remaining": str(fake.rate_remaining),
+                    "X-RateLimit-Reset": str(fake.rate_reset),
+                    "X-RateLimit-Resource": "core",
+                }
+
+        if injected is None and not limited:
+            return False
+
+        # Drain the request body so the connection can be reused
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if limited:
+            self._send_json(403, {"message": "API rate limit exceeded"})
+            return True
+
+        status, retry_after = injected
+        if retry_after is not None:
+            self._rate_headers["Retry-After"] = str(retry_after)
+        self._send_json(status, {"message": "Injected error"})
+        return True
+
+    def _json_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        self._record("GET")
+        if self._intercepted():
+            return
+        parsed = urlparse(self.path)
+        path = parsed.path
+        repo_prefix = f"/repos/{OWNER}/{REPO}/"
+        contents_prefix = f"{repo_prefix}contents/"
+        raw_prefix = f"/raw/{OWNER}/{REPO}/"
+        fake = self.fake
+
+        if path.startswith(contents_prefix):
+            file_path = path[len(contents_prefix) :]
+            ref = parse_qs(parsed.query).get("ref", ["main"])[0]
+            files = fake.files_at(ref)
+            if files is None:
+                return self._send_json(404, {"message": "No commit found for the ref"})
+            if file_path in files:
+                content = files[file_path]
+                return self._send_json(
+                    200,
+                    {
+                        "type": "file",
+                        "name": file_path.rsplit("/", 1)[-1],
+                        "path": file_path,
+                        "sha": blob_sha(content),
+                        "size": len(content),
+                    },
+                    etag=True,
+                )
+            listing = fake.list_dir(file_path, files)
+            if listing is None:
+                return self._send_json(404, {"message": "Not Found"})
+            return self._send_json(200, listing, etag=True)
+
+        if path.startswith(raw_prefix):
+            ref, _, file_path = path[len(raw_prefix) :].partition("/")
+            content = (fake.files_at(ref) or {}).get(file_path)
+            if content is None:
+                return self._send(404, b"404: Not Found", "text/plain")
+            return self._send(
+                200, content, "text/plain; charset=utf-8", etag=f'"{blob_sha(content)}"'
+            )
+
+        route = path[len(repo_prefix) :] if path.startswith(repo_prefix) else ""
+
+        if route.startswith("branches/"):
+            sha = fake.head(route[len("branches/") :])
+            if sha is None:
+                return self._send_json(404, {"message": "Branch not found"})
+            tree = fake.commits[sha]["tree"]
+            return self._send_json(
+                200, {"commit": {"sha": sha, "commit": {"tree": {"sha": tree}}}}
+            )
+
+        if route.startswith("git/ref/heads/"):
+            sha = fake.head(route[len("git/ref/heads/") :])
+            if sha is None:
+                return self._send_json(404, {"message": "Not Found"})
+            return self._send_json(
+                200,
+                {
+                    "ref": f"refs/{route[len('git/ref/') :]}",
+                    "object": {"sha": sha, "type": "commit"},
+                },
+                etag=True,
+            )
+
+        if route.startswith("git/commits/"):
+            commit = fake.commits.get(route[len("git/commits/") :])
+            if commit is None:
+                return self._send_json(404, {"message": "Not Found"})
+            return self._send_json(
+                200,
+                {
+                    "sha": route[len("git/commits/") :],
+                    "tree": {"sha": commit["tree"]},
+                    "parents": [{"sha": p} for p in commit["parents"]],
+                    "message": commit["message"],
+                },
+            )
+
+        if route.startswith("git/trees/"):
+            tree_ish = route[len("git/trees/") :]
+            # Like GitHub, accept a branch name or commit sha as well as a tree sha
+            if fake.head(tree_ish):
+                tree_ish = fake.commits[fake.head(tree_ish)]["tree"]
+            elif tree_ish in fake.commits:
+                tree_ish = fake.commits[tree_ish]["tree"]
+            if tree_ish not in fake.trees:
+                return self._send_json(404, {"message": "Not Found"})
+            return self._send_json(
+                200,
+                {
+                    "sha": tree_ish,
+                    "tree": fake.tree_listing(tree_ish),
+                    "truncated": False,
+                },
+                etag=True,
+            )
+
+        self._send_json(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        self._record("POST")
+        if self._intercepted():
+            return
+        route = urlparse(self.path).path[len(f"/repos/{OWNER}/{REPO}/") :]
+        body = self._json_body()
+        fake = self.fake
+
+        with fake._lock:
+            if route == "git/blobs":
+                content = body.get("content", "")
+                if body.get("encoding") == "base64":
+                    content = base64.b64decode(content)
+                else:
+                    content = content.encode()
+                sha = blob_sha(content)
+                fake.blobs[sha] = content
+                return self._send_json(201, {"sha": sha})
+
+            if route == "git/trees":
+                tree = {}
+                if body.get("base_tree"):
+                    if body["base_tree"] not in fake.trees:
+                        return self._send_json(422, {"message": "Invalid base_tree"})
+                    tree = dict(fake.trees[body["base_tree"]])
+                for entry in body.get("tree", []):
+                    if "content" in entry:
+                        content = entry["content"].encode()
+                        fake.blobs[blob_sha(content)] = content
+                        tree[entry["path"]] = blob_sha(content)
+                    elif entry.get("sha") is None:
+                        tree.pop(entry["path"], None)
+                    elif entry["sha"] not in fake.blobs:
+                        return self._send_json(422, {"message": "Invalid sha"})
+                    else:
+                        tree[entry["path"]] = entry["sha"]
+                return self._send_json(201, {"sha": fake._store_tree(tree)})
+
+            if route == "git/commits":
+                if body.get("tree") not in fake.trees:
+                    return self._send_json(422, {"message": "Invalid tree"})
+                sha = fake._commit(
+                    body["tree"], body.get("parents", []), body.get("message", "")
+                )
+                return self._send_json(201, {"sha": sha})
+
+            if route == "git/refs":
+                ref = body.get("ref", "")[len("refs/") :]
+                if ref in fake.refs:
+                    return self._send_json(422, {"message": "Reference already exists"})
+                if body.get("sha") not in fake.commits:
+                    return self._send_json(422, {"message": "Object does not exist"})
+                fake.set_head(ref[len("heads/") :], body["sha"])
+                return self._send_json(
+                    201, {"ref": body["ref"], "object": {"sha": body["sha"]}}
+                )
+
+            if route == "pulls":
+                if fake.head(body.get("head", "")) is None:
+                    return self._send_json(422, {"message": "Validation Failed"})
+                fake.pulls.append(body)
+                number = len(fake.pulls)
+                return self._send_json(
+                    201,
+                    {
+                        "number": number,
+                        "html_url": f"https://github.com/{OWNER}/{REPO}/pull/{number}",
+                    },
+                )
+
+        self._send_json(404, {"message": "Not Found"})
+
+    def do_PATCH(self):
+        self._record("PATCH")
+        if self._intercepted():
+            return
+        route = urlparse(self.path).path[len(f"/repos/{OWNER}/{REPO}/") :]
+        body = self._json_body()
+        fake = self.fake
+
+        with fake._lock:
+            if route.startswith("git/refs/heads/"):
+                branch = route[len("git/refs/heads/") :]
+                current = fake.head(branch)
+                if current is None or body.get("sha") not in fake.commits:
+                    return self._send_json(422, {"message": "Reference update failed"})
+                if not body.get("force") and current not in _ancestors(
+                    fake, body["sha"]
+                ):
+                    return self._send_json(
+                        422, {"message": "Update is not a fast forward"}
+                    )
+                fake.set_head(branch, body["sha"])
+                return self._send_json(200, {"object": {"sha": body["sha"]}})
+
+        self._send_json(404, {"message": "Not Found"})
+
+    def do_PUT(self):
+        self._record("PUT")
+        if self._intercepted():
+            return
+        contents_prefix = f"/repos/{OWNER}/{REPO}/contents/"
+        path = urlparse(self.path).path
+        body = self._json_body()
+        fake = self.fake
+
+        with fake._lock:
+            if path.startswith(contents_prefix):
+                file_path = path[len(contents_prefix) :]
+                branch = body.get("branch", "main")
+                head = fake.head(branch)
+                if head is None:
+                    return self._send_json(404, {"message": "Branch not found"})
+                tree = dict(fake.trees[fake.commits[head]["tree"]])
+                if file_path in tree and body.get("sha") != tree[file_path]:
+                    return self._send_json(409, {"message": "sha does not match"})
+                content = base64.b64decode(body.get("content", ""))
+                fake.blobs[blob_sha(content)] = content
+                existed = file_path in tree
+                tree[file_path] = blob_sha(content)
+                commit = fake._commit(
+                    fake._store_tree(tree), [head], body.get("message", "")
+                )
+                fake.set_head(branch, commit)
+                return self._send_json(
+                    200 if existed else 201,
+                    {"content": {"path": file_path, "sha": blob_sha(content)}},
+                )
+
+        self._send_json(404, {"message": "Not Found"})
+
+
+def _ancestors(fake, commit_sha):
+    """Every commit reachable from commit_sha, including itself"""
+    seen = set()
+    stack = [commit_sha]
+    while stack:
+        sha = stack.pop()
+        if sha in seen or sha not in fake.commits:
+            continue
+        seen.add(sha)
+        stack.extend(fake.commits[sha]["parents"])
+    return seen
@@ -0,0 +1,279 @@
+"""
+Shared client for every GitHub request made by OpenVault.
+
+util.py, contribute.py, migrate_info_files.py and sync_mirror.py all go through
+the module-level `github` client, which provides:
+
+- one pooled session with token auth (GITHUB_TOKEN),
+- retries with exponential backoff and full jitter for 5xx responses,
+  connection errors, 429s and primary/secondary rate-limit 403s, honouring
+  Retry-After and X-RateLimit-Reset,
+- proactive throttling: once fewer than GITHUB_THROTTLE_THRESHOLD requests
+  remain in the current window, requests are spaced out so the budget lasts
+  until the reset instead of running dry,
+- per-endpoint latency counters and the last seen rate-limit budget, reported
+  by /api/search-stats.
+"""
+
+import os
+import random
+import threading
+import time
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+load_dotenv()
+
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+# Connections kept open to GitHub, shared by all threads
+GITHUB_POOL_SIZE = int(os.getenv("GITHUB_POOL_SIZE", "16"))
+# Retries of a failed request before its last response is returned
+GITHUB_MAX_RETRIES = int(os.getenv("GITHUB_MAX_RETRIES", "4"))
+# First backoff delay in seconds; the ceiling doubles with every retry
+GITHUB_BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "0.5"))
+# Longest single wait in seconds; a longer Retry-After or reset is not waited out
+GITHUB_MAX_WAIT = float(os.getenv("GITHUB_MAX_WAIT", "30"))
+# Remaining requests below which calls are spaced out until the window resets;
+# budgets no larger than this, such as unauthenticated ones, are never paced
+GITHUB_THROTTLE_THRESHOLD = int(os.getenv("GITHUB_THROTTLE_THRESHOLD", "100"))
+
+# Methods that are safe to send twice after a server error or dropped connection
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+def endpoint_name(method, url):
+    """Group a request under a short label such as "GET contents" or "POST git/blobs" """
+    if "/repos/" not in url:
+        return f"{method} raw"
+    # /repos/<owner>/<repo>/<route>
+    route = url.split("?", 1)[0].split("/repos/", 1)[1].split("/")[2:]
+    if not route:
+        return f"{method} repo"
+    depth = 2 if route[0] == "git" else 1
+    return f"{method} {'/'.join(route[:depth])}"
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        token=GITHUB_TOKEN,
+        pool_size=GITHUB_POOL_SIZE,
+        max_retries=GITHUB_MAX_RETRIES,
+        backoff_base=GITHUB_BACKOFF_BASE,
+        max_wait=GITHUB_MAX_WAIT,
+        throttle_threshold=GITHUB_THROTTLE_THRESHOLD,
+    ):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+        self.session.headers["Accept"] = "application/vnd.github.v3+json"
+
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_wait = max_wait
+        self.throttle_threshold = throttle_threshold
+
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._budget = {}
+        self._next_slot = 0.0
+        self._totals = {"retries": 0, "rate_limited": 0, "throttled_seconds": 0.0}
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, retrying rate limits and transient failures.
+
+        Returns the final response, which may still be an error response once
+        retries run out or the required wait exceeds max_wait. Connection
+        errors are raised the same way requests raises them.
+        """
+        endpoint = endpoint_name(method, url)
+        is_api = "/repos/" in url
+        body = kwargs.get("data")
+
+        attempt = 0
+        while True:
+            if is_api:
+                self._throttle()
+            if attempt and hasattr(body, "seek"):
+                body.seek(0)
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                self._record(endpoint, time.perf_counter() - start, error=True)
+                if method not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                self._record(endpoint, time.perf_counter() - start, response=response)
+                delay = self._retry_delay(method, response, attempt)
+                if delay is None:
+                    return response
+
+            attempt += 1
+            with self._lock:
+                self._totals["retries"] += 1
+                self._endpoints[endpoint]["retries"] += 1
+            time.sleep(delay)
+
+    def _backoff(self, attempt):
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        return random.uniform(0, min(self.max_wait, self.backoff_base * 2**attempt))
+
+    def _retry_delay(self, method, response, attempt):
+        """Seconds to wait before retrying a response, or None to return it"""
+        if attempt >= self.max_retries:
+            return None
+
+        status = response.status_code
+        rate_limited = status == 429 or (
+            status == 403
+            and (
+                response.headers.get("X-RateLimit-Remaining") == "0"
+                or "rate limit" in response.text.lower()
+            )
+        )
+
+        if rate_limited:
+            with self._lock:
+                self._totals["rate_limited"] += 1
+            wait = self._rate_limit_wait(response)
+            if wait is None:
+                wait = self._backoff(attempt)
+        elif status in RETRY_STATUSES and method in IDEMPOTENT_METHODS:
+            wait = self._retry_after(response)
+            if wait is None:
+                wait = self._backoff(attempt)
+        else:
+            return None
+
+        # Waiting out a long reset would hang the caller; let it handle the error
+        return wait if wait <= self.max_wait else None
+
+    def _retry_after(self, response):
+        try:
+            return max(float(response.headers["Retry-After"]), 0)
+        except (KeyError, ValueError):
+            return None
+
+    def _rate_limit_wait(self, response):
+        wait = self._retry_after(response)
+        if wait is not None:
+            return wait
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset = float(response.headers["X-RateLimit-Reset"])
+            except (KeyError, ValueError):
+                return None
+            return max(reset - time.time(), 0) + random.uniform(0, 1)
+        return None
+
+    def _throttle(self):
+        """Space requests out when the remaining budget is running low"""
+        with self._lock:
+            budget = self._budget.get("core")
+            # A budget no bigger than the threshold (60/hour without a token)
+            # would be paced from its first response; retries handle running dry
+            if (
+                not budget
+                or budget["limit"] <= self.throttle_threshold
+                or budget["remaining"] >= self.throttle_threshold
+            ):
+                return
+            until_reset = budget["reset"] - time.time()
+            if until_reset <= 0:
+                return
+
+            # Hand out evenly spaced slots so all threads together keep the pace
+            interval = until_reset / max(budget["remaining"], 1)
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + interval
+            delay = min(slot - now, self.max_wait)
+            self._totals["throttled_seconds"] += delay
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def _record(self, endpoint, elapsed, response=None, error=False):
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint,
+                {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                },
+            )
+            elapsed_ms = elapsed * 1000
+            stats["requests"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if error or (response is not None and response.status_code >= 400):
+                stats["errors"] += 1
+
+            if response is None:
+                return
+            headers = response.headers
+            if "X-RateLimit-Remaining" in headers:
+                try:
+                    self._budget[headers.get("X-RateLimit-Resource", "core")] = {
+                        "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                        "remaining": int(headers["X-RateLimit-Remaining"]),
+                        "reset": int(headers.get("X-RateLimit-Reset", 0)),
+                    }
+                except ValueError:
+                    pass
+
+    def request_counts(self):
+        """Requests sent so far, split into GitHub API calls and raw downloads"""
+        with self._lock:
+            counts = {"api": 0, "raw": 0}
+            for endpoint, stats in self._endpoints.items():
+                kind = "raw" if endpoint.endswith(" raw") else "api"
+                counts[kind] += stats["requests"]
+        return counts
+
+    def metrics(self):
+        """Per-endpoint request counts and latency, the rate-limit budget, and totals"""
+        with self._lock:
+            endpoints = {}
+            for endpoint, stats in sorted(self._endpoints.items()):
+                endpoints[endpoint] = dict(
+                    stats,
+                    total_ms=round(stats["total_ms"], 1),
+                    max_ms=round(stats["max_ms"], 1),
+                    avg_ms=round(stats["total_ms"] / stats["requests"], 1),
+                )
+            return {
+                "endpoints": endpoints,
+                "budget": {name: dict(budget) for name, budget in self._budget.items()},
+                "retries": self._totals["retries"],
+                "rate_limited": self._totals["rate_limited"],
+                "throttled_seconds": round(self._totals["throttled_seconds"], 2),
+            }
+
+
+github = GitHubClient()
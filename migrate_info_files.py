@@ -7,7 +7,8 @@ This script allows you to:
 3. Generate updated files or push them directly to GitHub
 
 Usage:
-    python migrate_info_files.py --transform=<function_name> [--push] [--branch=<name>]
+    python migrate_info_files.py --transform=<function_name> [--push [--dry-run]] [--branch=<name>]
+                                 [--workers=16] [--cache=<file>] [--fresh] [--mirror=<dir>]
 
 Examples:
     # Preview changes only
@@ -18,17 +19,30 @@ Examples:
 
     # Push directly to GitHub (requires GITHUB_TOKEN)
     python migrate_info_files.py --transform=my_transform --push --branch=my-migration
+
+    # Show the fields a push would change, without writing anything
+    python migrate_info_files.py --transform=my_transform --push --dry-run
+
+    # Read from a local mirror synced with sync_mirror.py instead of GitHub
+    python migrate_info_files.py --transform=my_transform --mirror=openvault_mirror
+
+    # Re-crawl every file instead of resuming from .migration_cache.json
+    python migrate_info_files.py --transform=my_transform --fresh
 """
 
 from dotenv import load_dotenv
 import requests
 import json
-import base64
 import os
 import sys
 import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Callable, Optional
 
+from github_client import github
+from mirror import LocalMirror, git_blob_sha
+
 load_dotenv()
 
 # GitHub configuration
@@ -38,7 +52,17 @@ GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
 
 # API endpoints
 API_BASE = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}"
-RAW_BASE = f"https://raw.githubusercontent.com/{GITHUB_OWNER}/{GITHUB_REPO}/main"
+# Raw files are read at a commit SHA; main's raw URLs can be served stale by the CDN
+RAW_ROOT = f"https://raw.githubusercontent.com/{GITHUB_OWNER}/{GITHUB_REPO}"
+
+# Concurrent info.json downloads while crawling the vault
+CRAWL_WORKERS = int(os.environ.get("MIGRATION_WORKERS", "16"))
+
+# Crawl progress is saved here so an interrupted run can resume
+CRAWL_CACHE_PATH = os.environ.get("MIGRATION_CACHE", ".migration_cache.json")
+
+# Downloads between checkpoint writes
+CHECKPOINT_EVERY = 50
 
 
 # ==================== TRANSFORMATION FUNCTIONS ====================
@@ -96,55 +120,203 @@ TRANSFORM_REGISTRY = {
 # ==================== CORE FUNCTIONS ====================
 
 
-def fetch_all_info_files() -> List[Dict[str, Any]]:
-    """Fetch all info.json files from the repository."""
-    sections = {
-        "code": ["autonomous", "full-repo", "teleop", "vision"],
-        "cad": [
-            "active-intakes",
-            "claws",
-            "dead-axles",
-            "drivetrains",
-            "outtakes",
-            "power-transmissions",
-            "robots",
-        ],
-        "portfolios": ["portfolios"],
+def _info_file_entry(path: str, sha: str) -> Optional[Dict[str, Any]]:
+    """Entry for ftc/<section>/<subsection>/<folder>/info.json, or None for other paths."""
+    parts = path.split("/")
+    if len(parts) != 5 or parts[0] != "ftc" or parts[4] != "info.json":
+        return None
+    if "filler" in parts[3]:
+        return None
+    return {
+        "path": path,
+        "sha": sha,
+        "section": parts[1],
+        "subsection": parts[2],
+        "folder": parts[3],
     }
 
+
+def _list_dir(path: str, ref: str) -> List[Dict[str, Any]]:
+    response = github.get(f"{API_BASE}/contents/{path}", params={"ref": ref})
+    if response.status_code != 200:
+        print(f"  Warning: Could not access {path}")
+        return []
+    return [entry for entry in response.json() if entry["type"] == "dir"]
+
+
+def _list_info_files_by_contents(ref: str) -> List[Dict[str, Any]]:
+    """
+    Walk the contents API to find every info.json.
+
+    Used when the recursive tree listing is unavailable or truncated. The SHA
+    of each entry is its folder's tree SHA, which also changes whenever the
+    info.json inside it does.
+    """
+    subsections = [
+        subsection["path"]
+        for section in _list_dir("ftc", ref)
+        for subsection in _list_dir(section["path"], ref)
+    ]
+
+    with ThreadPoolExecutor(max_workers=CRAWL_WORKERS) as executor:
+        listings = executor.map(lambda path: _list_dir(path, ref), subsections)
+
+    entries = []
+    for folders in listings:
+        for folder in folders:
+            entry = _info_file_entry(f"{folder['path']}/info.json", folder["sha"])
+            if entry:
+                entries.append(entry)
+    return entries
+
+
+def head_commit(branch: str = "main") -> Optional[str]:
+    """SHA of the commit a branch points at, or None if it cannot be read."""
+    response = github.get(f"{API_BASE}/branches/{branch}")
+    if response.status_code != 200:
+        print(f"Error getting branch: {response.text}")
+        return None
+    return response.json()["commit"]["sha"]
+
+
+def list_info_files(ref: str = "main") -> List[Dict[str, Any]]:
+    """
+    List every info.json in the vault with its blob SHA in one recursive tree call.
+
+    ref is a branch or commit SHA; pass a commit to get SHAs that match what
+    _download_info_file reads at that commit.
+    """
+    response = github.get(
+        f"{API_BASE}/git/trees/{ref}",
+        params={"recursive": "1"},
+    )
+    if response.status_code != 200 or response.json().get("truncated"):
+        print("  Recursive tree listing unavailable, walking directories instead")
+        return _list_info_files_by_contents(ref)
+
+    entries = []
+    for item in response.json()["tree"]:
+        if item["type"] == "blob":
+            entry = _info_file_entry(item["path"], item["sha"])
+            if entry:
+                entries.append(entry)
+    return entries
+
+
+def _load_checkpoint(cache_path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(cache_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoint(cache_path: str, cache: Dict[str, Dict[str, Any]]):
+    # Write to a temporary file first so an interrupt never leaves half a checkpoint
+    temp_path = f"{cache_path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(temp_path, cache_path)
+
+
+def _download_info_file(entry: Dict[str, Any], commit: str):
+    try:
+        response = github.get(f"{RAW_ROOT}/{commit}/{entry['path']}")
+        if response.status_code != 200:
+            return entry, None, f"HTTP {response.status_code}"
+        return entry, response.json(), None
+    except (requests.RequestException, ValueError) as e:
+        return entry, None, str(e)
+
+
+def _read_mirror_info_files(mirror_path: str) -> List[Dict[str, Any]]:
+    """Read every info.json from a local mirror of the vault."""
+    mirror = LocalMirror(mirror_path)
+    manifest_files = mirror.manifest()["files"]
+
     all_files = []
+    for section in mirror.list_dirs("ftc"):
+        for subsection in mirror.list_dirs(f"ftc/{section}"):
+            for folder in mirror.list_dirs(f"ftc/{section}/{subsection}"):
+                path = f"ftc/{section}/{subsection}/{folder}/info.json"
+                entry = _info_file_entry(path, manifest_files.get(path))
+                content = mirror.read_bytes(path)
+                if entry is None or content is None:
+                    continue
+                try:
+                    entry["data"] = json.loads(content)
+                except ValueError as e:
+                    print(f"  Error parsing {path}: {e}")
+                    continue
+                entry["sha"] = entry["sha"] or git_blob_sha(content)
+                all_files.append(entry)
 
-    for section, subsections in sections.items():
-        for subsection in subsections:
-            api_url = f"{API_BASE}/contents/ftc/{section}/{subsection}"
-            print(f"Fetching {section}/{subsection}...")
+    return all_files
+
+
+def fetch_all_info_files(
+    workers: int = CRAWL_WORKERS,
+    cache_path: Optional[str] = CRAWL_CACHE_PATH,
+    mirror_path: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch all info.json files from the repository.
+
+    Files are listed with one recursive tree call and downloaded concurrently,
+    both at the commit main points at when the crawl starts, so every SHA is
+    stored with the content it names. Downloads are checkpointed to cache_path keyed by SHA, so an interrupted
+    crawl resumes where it stopped and unchanged files are never downloaded
+    twice. Pass cache_path=None to always download everything, or mirror_path
+    to read from a local mirror (see sync_mirror.py) without any network calls.
+    """
+    if mirror_path:
+        return _read_mirror_info_files(mirror_path)
+
+    commit = head_commit()
+    if commit is None:
+        return []
+    entries = list_info_files(commit)
+    listed = {entry["path"] for entry in entries}
+
+    cache = _load_checkpoint(cache_path) if cache_path else {}
+    cache = {path: cached for path, cached in cache.items() if path in listed}
+
+    pending = [
+        entry
+        for entry in entries
+        if cache.get(entry["path"], {}).get("sha") != entry["sha"]
+    ]
+    print(
+        f"  {len(entries)} info.json files: {len(entries) - len(pending)} from "
+        f"checkpoint, {len(pending)} to download"
+    )
 
-            response = requests.get(api_url)
-            if response.status_code != 200:
-                print(f"  Warning: Could not access {section}/{subsection}")
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(_download_info_file, entry, commit) for entry in pending
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            entry, data, error = future.result()
+            if error:
+                print(f"  Error fetching {entry['path']}: {error}")
                 continue
 
-            entries = response.json()
-            for entry in entries:
-                if entry["type"] == "dir" and "filler" not in entry["name"]:
-                    info_path = f"ftc/{section}/{subsection}/{entry['name']}/info.json"
-                    info_url = f"{RAW_BASE}/{info_path}"
-
-                    info_response = requests.get(info_url)
-                    if info_response.status_code == 200:
-                        try:
-                            info_data = info_response.json()
-                            all_files.append(
-                                {
-                                    "path": info_path,
-                                    "data": info_data,
-                                    "section": section,
-                                    "subsection": subsection,
-                                    "folder": entry["name"],
-                                }
-                            )
-                        except Exception as e:
-                            print(f"  Error parsing {info_path}: {e}")
+            cache[entry["path"]] = {"sha": entry["sha"], "data": data}
+            if cache_path and done % CHECKPOINT_EVERY == 0:
+                _save_checkpoint(cache_path, cache)
+                print(f"  [{done}/{len(pending)}] downloaded")
+    finally:
+        # On Ctrl+C, drop queued downloads and keep what has finished
+        executor.shutdown(wait=True, cancel_futures=True)
+        if cache_path:
+            _save_checkpoint(cache_path, cache)
+
+    all_files = []
+    for entry in entries:
+        cached = cache.get(entry["path"])
+        if cached and cached["sha"] == entry["sha"]:
+            all_files.append(dict(entry, data=cached["data"]))
 
     return all_files
 
@@ -187,102 +359,147 @@ def generate_local_files(
     print(f"\n✓ Updated files saved to ./{output_dir}/")
 
 
-def get_file_sha(file_path: str, branch: str = "main") -> Optional[str]:
-    """Get the SHA of an existing file in the repository."""
-    url = f"{API_BASE}/contents/{file_path}?ref={branch}"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
+def _file_content(file_info: Dict[str, Any]) -> str:
+    return json.dumps(file_info["modified_data"], indent=4)
 
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json()["sha"]
-    return None
 
+def diff_summary(files: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Print the fields each modified file adds, removes, or changes, and return the totals."""
+    totals = {"added": 0, "removed": 0, "changed": 0}
 
-def create_branch(branch_name: str, base_branch: str = "main") -> bool:
-    """Create a new branch from base branch."""
-    ref_url = f"{API_BASE}/git/ref/heads/{base_branch}"
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json",
-    }
+    for file_info in files:
+        before = file_info["data"]
+        after = file_info["modified_data"]
+        added = [key for key in after if key not in before]
+        removed = [key for key in before if key not in after]
+        changed = [key for key in after if key in before and after[key] != before[key]]
 
-    response = requests.get(ref_url, headers=headers)
-    if response.status_code != 200:
-        print(f"Error getting base branch: {response.text}")
-        return False
+        print(f"  {file_info['path']}")
+        for symbol, keys in (("+", added), ("-", removed), ("~", changed)):
+            for key in keys:
+                print(f"      {symbol} {key}")
+
+        totals["added"] += len(added)
+        totals["removed"] += len(removed)
+        totals["changed"] += len(changed)
 
-    base_sha = response.json()["object"]["sha"]
+    print(
+        f"\n  {len(files)} files: {totals['added']} fields added, "
+        f"{totals['removed']} removed, {totals['changed']} changed"
+    )
+    return totals
 
-    create_ref_url = f"{API_BASE}/git/refs"
-    data = {"ref": f"refs/heads/{branch_name}", "sha": base_sha}
 
-    response = requests.post(create_ref_url, headers=headers, json=data)
-    if response.status_code == 201:
-        print(f"✓ Created branch: {branch_name}")
-        return True
-    elif "already exists" in response.text.lower():
-        print(f"⚠ Branch already exists: {branch_name}")
-        return True
-    else:
-        print(f"Error creating branch: {response.text}")
-        return False
+def _create_blob(file_info: Dict[str, Any]):
+    response = github.post(
+        f"{API_BASE}/git/blobs",
+        json={"content": _file_content(file_info), "encoding": "utf-8"},
+    )
+    if response.status_code != 201:
+        return file_info, None, response.text
+    return file_info, response.json()["sha"], None
 
 
-def push_to_github(files: List[Dict[str, Any]], branch_name: str, commit_message: str):
-    """Push modified files to GitHub."""
+def push_to_github(
+    files: List[Dict[str, Any]],
+    branch_name: str,
+    commit_message: str,
+    base_branch: str = "main",
+) -> bool:
+    """
+    Push modified files to GitHub as a single commit.
+
+    The blobs are uploaded concurrently, then one tree and one commit are
+    created on top of the branch (or the base branch, if the branch does not
+    exist yet) and the branch ref is moved to that commit.
+    """
     if not GITHUB_TOKEN:
         print("ERROR: GITHUB_TOKEN environment variable not set")
         return False
 
-    # Create branch
-    if not create_branch(branch_name):
-        return False
-
-    # Upload each file
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json",
-    }
-
-    for i, file_info in enumerate(files, 1):
-        print(f"[{i}/{len(files)}] Uploading {file_info['path']}...")
+    calls_before = github.request_counts()["api"]
 
-        url = f"{API_BASE}/contents/{file_info['path']}"
-        content = json.dumps(file_info["modified_data"], indent=4)
-        encoded_content = base64.b64encode(content.encode()).decode()
+    # Build on the branch if an earlier run created it, otherwise on the base
+    branch_exists = True
+    response = github.get(f"{API_BASE}/branches/{branch_name}")
+    if response.status_code == 404:
+        branch_exists = False
+        response = github.get(f"{API_BASE}/branches/{base_branch}")
+    if response.status_code != 200:
+        print(f"Error getting branch: {response.text}")
+        return False
 
-        sha = get_file_sha(file_info["path"], branch_name)
+    parent = response.json()["commit"]
+    parent_sha = parent["sha"]
+    parent_tree = parent["commit"]["tree"]["sha"]
+
+    print(f"Uploading {len(files)} blobs...")
+    tree = []
+    with ThreadPoolExecutor(max_workers=CRAWL_WORKERS) as executor:
+        for file_info, sha, error in executor.map(_create_blob, files):
+            if error:
+                print(f"  ✗ Failed to upload {file_info['path']}: {error}")
+                return False
+            tree.append(
+                {
+                    "path": file_info["path"],
+                    "mode": "100644",
+                    "type": "blob",
+                    "sha": sha,
+                }
+            )
+
+    response = github.post(
+        f"{API_BASE}/git/trees",
+        json={"base_tree": parent_tree, "tree": tree},
+    )
+    if response.status_code != 201:
+        print(f"Error creating tree: {response.text}")
+        return False
 
-        data = {
+    response = github.post(
+        f"{API_BASE}/git/commits",
+        json={
             "message": commit_message,
-            "content": encoded_content,
-            "branch": branch_name,
-        }
-
-        if sha:
-            data["sha"] = sha
-
-        response = requests.put(url, headers=headers, json=data)
-
-        if response.status_code in [200, 201]:
-            print(f"  ✓ Success")
-        else:
-            print(f"  ✗ Failed: {response.text}")
+            "tree": response.json()["sha"],
+            "parents": [parent_sha],
+        },
+    )
+    if response.status_code != 201:
+        print(f"Error creating commit: {response.text}")
+        return False
+    commit_sha = response.json()["sha"]
+
+    if branch_exists:
+        response = github.patch(
+            f"{API_BASE}/git/refs/heads/{branch_name}",
+            json={"sha": commit_sha},
+        )
+        expected_status = 200
+    else:
+        response = github.post(
+            f"{API_BASE}/git/refs",
+            json={"ref": f"refs/heads/{branch_name}", "sha": commit_sha},
+        )
+        expected_status = 201
+    if response.status_code != expected_status:
+        print(f"Error updating branch: {response.text}")
+        return False
 
+    api_calls = github.request_counts()["api"] - calls_before
+    print(
+        f"✓ Committed {len(files)} files to {branch_name} as {commit_sha[:7]} "
+        f"({api_calls} API calls)"
+    )
     return True
 
 
 def create_pull_request(branch_name: str, title: str, body: str) -> Optional[str]:
     """Create a pull request."""
     url = f"{API_BASE}/pulls"
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json",
-    }
-
     data = {"title": title, "body": body, "head": branch_name, "base": "main"}
 
-    response = requests.post(url, headers=headers, json=data)
+    response = github.post(url, json=data)
     if response.status_code == 201:
         pr_url = response.json()["html_url"]
         print(f"✓ Pull request created: {pr_url}")
@@ -306,6 +523,11 @@ def main():
         "--generate", action="store_true", help="Generate files locally"
     )
     parser.add_argument("--push", action="store_true", help="Push changes to GitHub")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --push, show what would be committed without writing anything",
+    )
     parser.add_argument(
         "--branch",
         default="migration",
@@ -313,6 +535,27 @@ def main():
     )
     parser.add_argument("--pr-title", help="Pull request title")
     parser.add_argument("--pr-body", help="Pull request body")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=CRAWL_WORKERS,
+        help=f"Concurrent downloads while crawling (default: {CRAWL_WORKERS})",
+    )
+    parser.add_argument(
+        "--cache",
+        default=CRAWL_CACHE_PATH,
+        help=f"Crawl checkpoint file (default: {CRAWL_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--mirror",
+        help="Read info.json files from this local mirror instead of GitHub "
+        "(run sync_mirror.py first so pushes are based on current files)",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore the crawl checkpoint and download every file again",
+    )
 
     args = parser.parse_args()
 
@@ -328,8 +571,13 @@ def main():
 
     # Fetch all files
     print("Fetching all info.json files...")
-    all_files = fetch_all_info_files()
-    print(f"Found {len(all_files)} files\n")
+    if args.fresh and os.path.exists(args.cache):
+        os.remove(args.cache)
+    start = time.perf_counter()
+    all_files = fetch_all_info_files(
+        workers=args.workers, cache_path=args.cache, mirror_path=args.mirror
+    )
+    print(f"Found {len(all_files)} files ({time.perf_counter() - start:.1f}s)\n")
 
     # Apply transformation
     print("Applying transformation...")
@@ -355,7 +603,15 @@ def main():
     print()
 
     # Generate or push
-    if args.push:
+    if args.push and args.dry_run:
+        print(f"Dry run - changes that would be committed to {args.branch}:")
+        diff_summary(modified)
+        # Up to two branch lookups, one blob per file, the tree, commit and ref
+        print(
+            f"\nPushing would make one commit using at most {len(modified) + 5} API calls"
+        )
+
+    elif args.push:
         print("Pushing to GitHub...")
         commit_msg = f"Apply {args.transform} transformation to info.json files"
 
@@ -377,6 +633,12 @@ def main():
         print("\nUse --generate to create files locally")
         print("Use --push to push to GitHub")
 
+    request_counts = github.request_counts()
+    print(
+        f"\nGitHub requests: {request_counts['api']} API, "
+        f"{request_counts['raw']} raw file downloads"
+    )
+
 
 if __name__ == "__main__":
     main()
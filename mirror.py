@@ -0,0 +1,139 @@
+"""
+Local mirror of the OpenVaultFiles repository.
+
+A mirror is a directory holding a copy of the vault, either a plain git
+checkout or one kept current with sync_mirror.py. Reading from it takes no
+network calls, so the app can serve records from disk (DATA_SOURCE=mirror)
+and tests and benchmarks can run offline.
+
+sync() records the commit and the blob SHA of every file in a manifest at the
+mirror root, so later syncs only download paths whose SHA changed and readers
+can tell from the manifest's modification time whether anything changed.
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+MANIFEST_NAME = ".openvault-mirror.json"
+
+
+def git_blob_sha(content):
+    """The SHA git assigns to a blob with this content"""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class LocalMirror:
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+
+    def _full_path(self, path):
+        return os.path.join(self.root, *path.split("/"))
+
+    def version(self):
+        """Changes whenever a sync changes the mirror; None for an unmanaged checkout"""
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"commit": None, "files": {}}
+
+    def list_dirs(self, path):
+        """Names of the directories directly under path, sorted"""
+        try:
+            with os.scandir(self._full_path(path)) as entries:
+                return sorted(entry.name for entry in entries if entry.is_dir())
+        except OSError:
+            return []
+
+    def read_bytes(self, path):
+        """Contents of a file in the mirror, or None if it does not exist"""
+        try:
+            with open(self._full_path(path), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_manifest(self, manifest):
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def sync(self, session, api_base, raw_root, workers=16, path_filter=None):
+        """
+        Bring the mirror up to date with the main branch on GitHub.
+
+        Lists the whole tree in one recursive call, downloads only the files
+        whose blob SHA differs from the manifest, and deletes files that are
+        gone upstream. path_filter, if given, limits which paths are mirrored.
+        Files are downloaded from {raw_root}/{commit sha}/{path}, because main's
+        raw URLs can be served stale for minutes after a merge.
+        Returns counts of downloaded, deleted and unchanged files.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.manifest()
+
+        branch = session.get(f"{api_base}/branches/main")
+        branch.raise_for_status()
+        commit = branch.json()["commit"]
+        if commit["sha"] == manifest["commit"]:
+            return {"downloaded": 0, "deleted": 0, "unchanged": len(manifest["files"])}
+
+        tree_sha = commit["commit"]["tree"]["sha"]
+        listing = session.get(f"{api_base}/git/trees/{tree_sha}?recursive=1")
+        listing.raise_for_status()
+        if listing.json().get("truncated"):
+            raise RuntimeError("GitHub truncated the tree listing; sync a git clone")
+
+        upstream = {
+            item["path"]: item["sha"]
+            for item in listing.json()["tree"]
+            if item["type"] == "blob"
+            and (path_filter is None or path_filter(item["path"]))
+        }
+        changed = [
+            path for path, sha in upstream.items() if manifest["files"].get(path) != sha
+        ]
+        removed = [path for path in manifest["files"] if path not in upstream]
+
+        def download(path):
+            response = session.get(f"{raw_root}/{commit['sha']}/{path}")
+            response.raise_for_status()
+            full_path = self._full_path(path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(response.content)
+            return path
+
+        # Record progress even if a download fails, so the next sync resumes
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for path in executor.map(download, changed):
+                    manifest["files"][path] = upstream[path]
+        except Exception:
+            self._write_manifest(manifest)
+            raise
+
+        for path in removed:
+            try:
+                os.remove(self._full_path(path))
+            except OSError:
+                pass
+            del manifest["files"][path]
+
+        manifest["commit"] = commit["sha"]
+        self._write_manifest(manifest)
+        return {
+            "downloaded": len(changed),
+            "deleted": len(removed),
+            "unchanged": len(upstream) - len(changed),
+        }
@@ -0,0 +1,124 @@
+"""
+LRU cache of search results.
+
+Entries are keyed by category, index generation, normalized query, filters
+and page, so a result is only reused while the category's index is unchanged.
+When a category's index moves to a new generation, its older entries are
+dropped straight away instead of waiting to age out. Memory is bounded by the
+number of entries and by not caching responses with more than max_results
+hits, such as unpaged result lists of large categories.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """
+    Collapse whitespace so trivially different spellings share an entry.
+
+    Case is kept: Whoosh treats AND, OR and NOT as operators only in capitals.
+    """
+    return " ".join(query.split())
+
+
+def filters_key(filters):
+    """Hashable form of {facet: [values]} that ignores ordering"""
+    return tuple(
+        sorted(
+            (facet, tuple(sorted(values))) for facet, values in (filters or {}).items()
+        )
+    )
+
+
+def copy_response(response):
+    # Callers round scores in place, so hand out copies of the hit dicts
+    return dict(response, results=[dict(hit) for hit in response["results"]])
+
+
+class QueryCache:
+    def __init__(self, max_entries=512, max_results=500):
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self._entries = OrderedDict()  # key -> (response, seconds it took)
+        self._generations = {}  # category -> index generation of its entries
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "saved_seconds": 0.0,
+            "miss_seconds": 0.0,
+        }
+
+    def _sync_generation(self, category, generation):
+        """Drop a category's entries from older generations of its index"""
+        if self._generations.get(category) == generation:
+            return
+        stale = [key for key in self._entries if key[0] == category]
+        for key in stale:
+            del self._entries[key]
+        self._stats["invalidations"] += len(stale)
+        self._generations[category] = generation
+
+    def get(self, category, generation, *key):
+        """A copy of the cached response, or None"""
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            self._sync_generation(category, generation)
+            entry = self._entries.get((category, *key))
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end((category, *key))
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += entry[1]
+            response = entry[0]
+        return copy_response(response)
+
+    def put(self, category, generation, *key, response, elapsed):
+        """Store a response that took elapsed seconds to compute"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._stats["miss_seconds"] += elapsed
+            if len(response["results"]) > self.max_results:
+                return
+            self._sync_generation(category, generation)
+            self._entries[(category, *key)] = (copy_response(response), elapsed)
+            self._entries.move_to_end((category, *key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self, category=None):
+        with self._lock:
+            if category is None:
+                self._entries.clear()
+                self._generations.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == category]:
+                    del self._entries[key]
+                self._generations.pop(category, None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        saved = stats.pop("saved_seconds")
+        miss_seconds = stats.pop("miss_seconds")
+        stats.update(
+            hit_ratio=round(stats["hits"] / lookups, 3) if lookups else None,
+            saved_ms=round(saved * 1000, 1),
+            avg_miss_ms=(
+                round(miss_seconds * 1000 / stats["misses"], 2)
+                if stats["misses"]
+                else None
+            ),
+            max_entries=self.max_entries,
+            max_results=self.max_results,
+        )
+        return stats
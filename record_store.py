@@ -0,0 +1,98 @@
+"""
+Server-side storage for category records.
+
+Flask's default session is a signed cookie, so records are kept here instead and
+the session only carries the active base and category. Records live in process
+memory by default; set RECORD_STORE_PATH to a SQLite file to share them between
+worker processes and keep them across restarts. The SQLite store keeps a
+RecordList's version and fingerprints with its records, so records read back
+still let the search index skip hashing them.
+"""
+
+import json
+import os
+import threading
+import time
+
+from sqlite_db import connect
+from util import RecordList
+
+RECORD_STORE_PATH = os.getenv("RECORD_STORE_PATH")
+
+
+def category_key(base, category):
+    return f"{base}/{category}"
+
+
+class MemoryRecordStore:
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._records.get(key)
+
+    def put(self, key, records):
+        with self._lock:
+            self._records[key] = records
+
+    def delete(self, key):
+        with self._lock:
+            self._records.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._records.keys())
+
+
+class SqliteRecordStore:
+    def __init__(self, path):
+        self.path = path
+        with connect(self.path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records "
+                "(key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT data FROM records WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        data = json.loads(row[0])
+        if isinstance(data, list):
+            # Written before version markers were stored
+            return data
+        return RecordList(data["records"], data["version"], data["fingerprints"])
+
+    def put(self, key, records):
+        data = {
+            "records": records,
+            "version": getattr(records, "version", None),
+            "fingerprints": getattr(records, "fingerprints", None) or {},
+        }
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO records (key, data, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(data), time.time()),
+            )
+
+    def delete(self, key):
+        with connect(self.path) as conn:
+            conn.execute("DELETE FROM records WHERE key = ?", (key,))
+
+    def keys(self):
+        with connect(self.path) as conn:
+            return [row[0] for row in conn.execute("SELECT key FROM records")]
+
+
+def _create_store():
+    if RECORD_STORE_PATH:
+        return SqliteRecordStore(RECORD_STORE_PATH)
+    return MemoryRecordStore()
+
+
+record_store = _create_store()
@@ -0,0 +1,201 @@
+"""
+Stale-while-revalidate loading of category records and search indexes.
+
+Once a category has been loaded, requests are always answered from the last
+known records and index. When the records are older than RECORD_CACHE_TTL, or
+a refresh is requested through /api/refresh-search-index, a background thread
+revalidates them with GitHub and updates the search index, so no request waits
+on the crawl. Concurrent refreshes of the same category share one run.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import search
+import util
+from record_store import category_key, record_store
+
+# Serve cached records while refreshing them in the background ("0" to disable).
+# Off by default on Vercel, which freezes background threads between requests
+STALE_WHILE_REVALIDATE = (
+    os.getenv("STALE_WHILE_REVALIDATE", "0" if os.getenv("VERCEL") else "1") != "0"
+)
+# Categories refreshed at the same time
+REFRESH_WORKERS = int(os.getenv("REFRESH_WORKERS", "4"))
+# Seconds to keep serving stale records before retrying a failed refresh
+REFRESH_RETRY_DELAY = float(os.getenv("REFRESH_RETRY_DELAY", "30"))
+
+_executor = ThreadPoolExecutor(
+    max_workers=REFRESH_WORKERS, thread_name_prefix="refresh"
+)
+_in_flight = {}
+_failed_at = {}
+_stored_versions = {}  # category key -> version of the records last stored
+_lock = threading.Lock()
+_stats = {
+    "scheduled": 0,
+    "deduplicated": 0,
+    "completed": 0,
+    "failed": 0,
+    "stale_served": 0,
+    "last_refresh": None,
+}
+
+
+class Refresh:
+    """
+    One background refresh of a category.
+
+    records resolves as soon as the records are fetched, done once the search
+    index has been updated as well.
+    """
+
+    def __init__(self):
+        self.records = Future()
+        self.done = Future()
+
+
+def _count(counter):
+    with _lock:
+        _stats[counter] += 1
+
+
+def _record_failure(key):
+    with _lock:
+        _stats["failed"] += 1
+        _failed_at[key] = time.monotonic()
+
+
+def _store_records(key, records):
+    """Keep records as the category's last good copy, skipping unchanged versions"""
+    version = getattr(records, "version", None)
+    with _lock:
+        if version is not None and _stored_versions.get(key) == version:
+            return
+        _stored_versions[key] = version
+    record_store.put(key, records)
+
+
+def _retry_due(key):
+    with _lock:
+        failed_at = _failed_at.get(key)
+    return failed_at is None or time.monotonic() - failed_at >= REFRESH_RETRY_DELAY
+
+
+def schedule_refresh(base, category, rebuild=False):
+    """
+    Refresh a category in the background, or join the refresh already running.
+
+    With rebuild, the search index is rebuilt from scratch rather than updated.
+    """
+    key = category_key(base, category)
+    with _lock:
+        refresh = _in_flight.get(key)
+        if refresh is not None:
+            _stats["deduplicated"] += 1
+            return refresh
+        refresh = Refresh()
+        _in_flight[key] = refresh
+        _stats["scheduled"] += 1
+
+    _executor.submit(_run_refresh, base, category, rebuild, refresh)
+    return refresh
+
+
+def _run_refresh(base, category, rebuild, refresh):
+    key = category_key(base, category)
+    try:
+        records = util.fetch_records(base, category, force_refresh=True)
+        if isinstance(records, list):
+            _store_records(key, records)
+        refresh.records.set_result(records)
+
+        if isinstance(records, list):
+            if rebuild:
+                search.force_index_rebuild(base, category)
+            search.build_index(records, base, category)
+            _count("completed")
+            with _lock:
+                _failed_at.pop(key, None)
+        else:
+            print(f"Background refresh of {key} failed: {records.get('error')}")
+            _record_failure(key)
+    except Exception as e:
+        print(f"Background refresh of {key} failed: {e}")
+        _record_failure(key)
+        if not refresh.records.done():
+            refresh.records.set_result({"error": str(e)})
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+            _stats["last_refresh"] = time.time()
+        refresh.done.set_result(None)
+
+
+def get_records(base, category):
+    """
+    Records for a category, keeping the last good copy in the record store.
+
+    Cached records are returned immediately, even when stale, and a stale
+    category is refreshed in the background. Only a category with nothing
+    cached yet waits for its records, joining any refresh already running.
+    """
+    key = category_key(base, category)
+
+    if STALE_WHILE_REVALIDATE:
+        cached = util.peek_cached_records(base, category)
+        if cached is not None:
+            records, fresh = cached
+            # Mirror records never pass through a refresh, so store them here
+            _store_records(key, records)
+            if not fresh:
+                _count("stale_served")
+                if _retry_due(key):
+                    schedule_refresh(base, category)
+            return records
+        records = schedule_refresh(base, category).records.result()
+    else:
+        records = util.fetch_records(base, category)
+        if isinstance(records, list):
+            _store_records(key, records)
+
+    if isinstance(records, list):
+        return records
+
+    # GitHub failed; fall back to the last records we served, if any
+    return record_store.get(key) or records
+
+
+def get_all_records(sections=None):
+    """
+    Records of every category, as {(base, category): records}.
+
+    Categories with nothing cached yet are all scheduled before waiting on
+    any, so a cold vault is crawled concurrently. Categories that fail to load
+    are left out.
+    """
+    sections = sections or util.SECTIONS
+    categories = [
+        (base, category) for base, names in sections.items() for category in names
+    ]
+    if STALE_WHILE_REVALIDATE:
+        for base, category in categories:
+            if util.peek_cached_records(base, category) is None:
+                schedule_refresh(base, category)
+
+    all_records = {}
+    for base, category in categories:
+        records = get_records(base, category)
+        if isinstance(records, list):
+            all_records[(base, category)] = records
+    return all_records
+
+
+def get_refresh_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["in_flight"] = sorted(_in_flight)
+    stats["stale_while_revalidate"] = STALE_WHILE_REVALIDATE
+    return stats
@@ -2,21 +2,75 @@ import os
 import tempfile
 import hashlib
 import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
 from whoosh.index import create_in, open_dir, exists_in
 from whoosh.fields import Schema, TEXT, ID, KEYWORD, STORED
 from whoosh.qparser import QueryParser, MultifieldParser
 from whoosh import writing
 from whoosh.analysis import StandardAnalyzer
-from whoosh.filedb.filestore import RamStorage
+from whoosh.filedb.filestore import RamStorage, FileStorage, copy_storage
+
+import util
+from facets import FACETS, GLOBAL_FACETS, FacetIndex
+from query_cache import QueryCache, filters_key, normalize_query
+from singleflight import SingleFlight
+from suggest import PrefixIndex
+
+# Directory holding the prebuilt index artifact written by build_search_index.py
+SEARCH_INDEX_DIR = os.getenv(
+    "SEARCH_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_index"),
+)
+
+# Concurrent builds of the same index from the same records share one build
+_build_flight = SingleFlight()
+
+
+class _RamStorage(RamStorage):
+    """
+    RamStorage whose writers each get their own scratch directory.
+
+    Whoosh names it after the index ("MAIN.tmp" in the system temp directory),
+    so every in-memory index shares one. Background refreshes build several
+    categories' indexes at once, and a writer finishing would remove the
+    directory while another was still creating files in it.
+    """
+
+    def temp_storage(self, name=None):
+        return super().temp_storage()
 
 
 class WhooshSearchEngine:
-    def __init__(self, use_memory=True):
+    def __init__(
+        self,
+        use_memory=True,
+        background_optimize=False,
+        optimize_segments=8,
+        facets=FACETS,
+    ):
         self.use_memory = use_memory  # Use in-memory storage for serverless
+        self.facets = facets  # Facets the records can be filtered and counted by
         self.schema = self._create_schema()
         self.index = None
         self.storage = None
         self._records_hash = None  # Track if records have changed
+        self._fingerprints = {}  # uuid -> per-record hash of what is indexed
+        self._positions = None  # (records, uuid -> position in them)
+        self._facets = None  # (records, FacetIndex over them)
+        self._doc_positions = None  # (records, index version, docnum -> position)
+        self._indexed_records = None  # The records the index currently holds
+        self._prefix = None  # (generation, PrefixIndex) for type-ahead
+        self._write_lock = threading.Lock()
+        self.build_count = 0  # Number of times the index has been (re)built
+        self.update_count = 0  # Number of incremental updates applied
+        self.last_update = None  # Counts from the most recent incremental update
+        # Skip merging on incremental commits and optimize in the background instead
+        self.background_optimize = background_optimize
+        self.optimize_segments = optimize_segments
+        self._optimizing = False
 
     def _create_schema(self):
         """Create the search schema with appropriate field types"""
@@ -49,6 +103,12 @@ class WhooshSearchEngine:
         if not records:
             return None
 
+        # Records fetched from GitHub carry a version derived from git SHAs,
+        # which makes this check O(1) instead of serializing every record
+        version = getattr(records, "version", None)
+        if version:
+            return version
+
         # Create a hash based on the records content
         records_str = json.dumps(records, sort_keys=True, default=str)
         return hashlib.md5(records_str.encode()).hexdigest()
@@ -67,8 +127,58 @@ class WhooshSearchEngine:
 
         return False, current_hash
 
+    def _get_record_fingerprint(self, record):
+        """Hash of a single record, used to find which documents changed"""
+        record_str = json.dumps(record, sort_keys=True, default=str)
+        return hashlib.md5(record_str.encode()).hexdigest()
+
+    def _get_fingerprints(self, records):
+        """uuid -> fingerprint, reusing upstream git SHAs and hashing only the rest"""
+        known = getattr(records, "fingerprints", None) or {}
+        return {
+            record["uuid"]: known.get(record["uuid"])
+            or self._get_record_fingerprint(record)
+            for record in records
+        }
+
+    def _document_fields(self, record):
+        """Map a record onto the schema's fields"""
+        # Combine all searchable text content
+        content_parts = []
+        content_parts.append(record.get("title", ""))
+        content_parts.append(record.get("description", ""))
+        content_parts.append(record.get("author", ""))
+
+        # Add category-specific content
+        if "language" in record:
+            content_parts.append(record["language"])
+        if "awards_won" in record:
+            content_parts.append(record["awards_won"])
+        if "tags" in record:
+            content_parts.append(" ".join(record["tags"]))
+
+        combined_content = " ".join(str(part) for part in content_parts if part)
+
+        return dict(
+            uuid=record["uuid"],
+            title=record.get("title", ""),
+            description=record.get("description", ""),
+            author=record.get("author", ""),
+            team_number=str(record.get("team_number", "")),
+            seasons_used=" ".join(map(str, record.get("seasons_used", []))),
+            timestamp=record.get("timestamp", ""),
+            language=record.get("language", ""),
+            awards_won=record.get("awards_won", ""),
+            used_in_comp=str(record.get("used_in_comp", "")),
+            tags=" ".join(record.get("tags", [])),
+            preview_image_url=record.get("preview_image_url", ""),
+            download_url=record.get("download_url", ""),
+            onshape_link=record.get("onshape_link", ""),
+            content=combined_content,
+        )
+
     def build_index(self, records):
-        """Build or rebuild the Whoosh index from records"""
+        """Build the Whoosh index from records, or update it in place if one exists"""
         if not records:
             return None
 
@@ -76,12 +186,31 @@ class WhooshSearchEngine:
         needs_rebuild, current_hash = self._needs_rebuild(records)
 
         if not needs_rebuild and self.index is not None:
+            self._indexed_records = records
             return self.index
 
+        # Concurrent callers with the same records wait for one build
+        return _build_flight.do(
+            (id(self), current_hash), self._build_locked, records, current_hash
+        )
+
+    def _build_locked(self, records, current_hash):
+        fingerprints = self._get_fingerprints(records)
+
+        with self._write_lock:
+            # A build for these records may have finished while we waited
+            if self.index is not None and self._records_hash == current_hash:
+                return self.index
+            if self.index is not None and self._fingerprints:
+                return self._update_index(records, fingerprints, current_hash)
+            return self._rebuild_index(records, fingerprints, current_hash)
+
+    def _rebuild_index(self, records, fingerprints, current_hash):
+        """Create a brand-new index containing every record"""
         try:
             # Use in-memory storage for serverless environments
             if self.use_memory:
-                self.storage = RamStorage()
+                self.storage = _RamStorage()
                 self.index = self.storage.create_index(self.schema)
             else:
                 # Fallback to temporary directory for local development
@@ -91,43 +220,13 @@ class WhooshSearchEngine:
             writer = self.index.writer()
 
             for record in records:
-                # Combine all searchable text content
-                content_parts = []
-                content_parts.append(record.get("title", ""))
-                content_parts.append(record.get("description", ""))
-                content_parts.append(record.get("author", ""))
-
-                # Add category-specific content
-                if "language" in record:
-                    content_parts.append(record["language"])
-                if "awards_won" in record:
-                    content_parts.append(record["awards_won"])
-                if "tags" in record:
-                    content_parts.append(" ".join(record["tags"]))
-
-                combined_content = " ".join(str(part) for part in content_parts if part)
-
-                # Add document to index
-                writer.add_document(
-                    uuid=record["uuid"],
-                    title=record.get("title", ""),
-                    description=record.get("description", ""),
-                    author=record.get("author", ""),
-                    team_number=str(record.get("team_number", "")),
-                    seasons_used=" ".join(map(str, record.get("seasons_used", []))),
-                    timestamp=record.get("timestamp", ""),
-                    language=record.get("language", ""),
-                    awards_won=record.get("awards_won", ""),
-                    used_in_comp=str(record.get("used_in_comp", "")),
-                    tags=" ".join(record.get("tags", [])),
-                    preview_image_url=record.get("preview_image_url", ""),
-                    download_url=record.get("download_url", ""),
-                    onshape_link=record.get("onshape_link", ""),
-                    content=combined_content,
-                )
+                writer.add_document(**self._document_fields(record))
 
             writer.commit()
             self._records_hash = current_hash
+            self._fingerprints = fingerprints
+            self._indexed_records = records
+            self.build_count += 1
             return self.index
 
         except Exception as e:
@@ -135,7 +234,161 @@ class WhooshSearchEngine:
             # Reset state on error
             self.index = None
             self._records_hash = None
+            self._fingerprints = {}
+            return None
+
+    def _update_index(self, records, fingerprints, current_hash):
+        """Apply only the added, changed and removed records in a single writer"""
+        added = [r for r in records if r["uuid"] not in self._fingerprints]
+        changed = [
+            r
+            for r in records
+            if r["uuid"] in self._fingerprints
+            and self._fingerprints[r["uuid"]] != fingerprints[r["uuid"]]
+        ]
+        removed = [uuid for uuid in self._fingerprints if uuid not in fingerprints]
+
+        try:
+            if added or changed or removed:
+                if getattr(self.index.storage, "readonly", False):
+                    # Prebuilt indexes are read-only; copy into RAM before writing
+                    self.storage = _RamStorage()
+                    copy_storage(self.index.storage, self.storage)
+                    self.index = self.storage.open_index(schema=self.schema)
+                writer = self.index.writer()
+                for record in added:
+                    writer.add_document(**self._document_fields(record))
+                for record in changed:
+                    writer.update_document(**self._document_fields(record))
+                for uuid in removed:
+                    writer.delete_by_term("uuid", uuid)
+                # Leave segment merging to the optional background optimize
+                writer.commit(merge=not self.background_optimize)
+                self.update_count += 1
+
+            self._records_hash = current_hash
+            self._fingerprints = fingerprints
+            self._indexed_records = records
+            self.last_update = {
+                "added": len(added),
+                "updated": len(changed),
+                "removed": len(removed),
+            }
+
+        except Exception as e:
+            print(f"Error updating search index, rebuilding: {e}")
+            return self._rebuild_index(records, fingerprints, current_hash)
+
+        if self.background_optimize:
+            self._schedule_optimize()
+        return self.index
+
+    def _schedule_optimize(self):
+        """Merge index segments in a background thread once enough have piled up"""
+        if self._optimizing or len(self.index._segments()) < self.optimize_segments:
+            return
+
+        def optimize():
+            try:
+                with self._write_lock:
+                    if self.index is not None:
+                        self.index.optimize()
+            except Exception as e:
+                print(f"Background index optimize failed: {e}")
+            finally:
+                self._optimizing = False
+
+        self._optimizing = True
+        threading.Thread(target=optimize, daemon=True).start()
+
+    def save(self, path):
+        """Write the current index to a directory and return its change-tracking state"""
+        os.makedirs(path, exist_ok=True)
+        copy_storage(self.index.storage, FileStorage(path))
+        return {"records_hash": self._records_hash, "fingerprints": self._fingerprints}
+
+    def load(self, path, state):
+        """Open an index written by save() read-only, memory-mapping its files"""
+        self.storage = FileStorage(path, readonly=True)
+        self.index = self.storage.open_index(schema=self.schema)
+        self._records_hash = state["records_hash"]
+        self._fingerprints = state["fingerprints"]
+
+    def generation(self):
+        """Identifies the current contents of the index; changes on every rebuild or update"""
+        return (self._records_hash, self.build_count, self.update_count)
+
+    def memory_size(self):
+        """Approximate size of the index in bytes"""
+        if self.index is None:
+            return 0
+        storage = self.index.storage
+        return sum(storage.file_length(name) for name in storage.list())
+
+    def _same_records(self, cached, records):
+        """Whether cached was computed from records: the same list or the same version"""
+        if cached is records:
+            return True
+        version = getattr(records, "version", None)
+        return version is not None and version == getattr(cached, "version", None)
+
+    # The caches below are keyed on the records passed in rather than on the
+    # index's current records, which a concurrent refresh may have moved on
+
+    def _positions_for(self, records):
+        """uuid -> position in records, computed once per version of the records"""
+        cached = self._positions
+        if cached is None or not self._same_records(cached[0], records):
+            cached = self._positions = (
+                records,
+                {record["uuid"]: i for i, record in enumerate(records)},
+            )
+        return cached[1]
+
+    def _facets_for(self, records):
+        """FacetIndex for the records, built once per version of the records"""
+        cached = self._facets
+        if cached is None or not self._same_records(cached[0], records):
+            cached = self._facets = (records, FacetIndex(records, self.facets))
+        return cached[1]
+
+    def _doc_positions_for(self, index, searcher, records):
+        """
+        docnum -> record position for the index version the searcher reads, so
+        hits can be placed without loading their stored fields.
+        """
+        version = (index.storage, searcher.reader().generation())
+        cached = self._doc_positions
+        if (
+            cached is None
+            or cached[1] != version
+            or not self._same_records(cached[0], records)
+        ):
+            positions = self._positions_for(records)
+            cached = self._doc_positions = (
+                records,
+                version,
+                {
+                    docnum: positions[fields["uuid"]]
+                    for docnum, fields in searcher.reader().iter_docs()
+                    if fields["uuid"] in positions
+                },
+            )
+        return cached[2]
+
+    def prefix_index(self):
+        """
+        PrefixIndex over the records last indexed, built once per index
+        generation. None until the engine has indexed records.
+        """
+        records = self._indexed_records
+        if self.index is None or records is None:
             return None
+        generation = self.generation()
+        cached = self._prefix
+        if cached is None or cached[0] != generation:
+            cached = self._prefix = (generation, PrefixIndex(records))
+        return cached[1]
 
     def search(self, query_string, records, limit=None):
         """
@@ -157,27 +410,17 @@ class WhooshSearchEngine:
             ranked_indices = list(range(len(records)))
             return similarities, ranked_indices
 
-        # Create a multi-field parser that searches across multiple fields
-        parser = MultifieldParser(
-            ["title", "description", "author", "content"], index.schema
-        )
-
-        try:
-            query = parser.parse(query_string)
-        except:
-            # Fallback to simple content search if parsing fails
-            parser = QueryParser("content", index.schema)
-            try:
-                query = parser.parse(query_string)
-            except:
-                # If all parsing fails, return all records
-                similarities = [1.0] * len(records)
-                ranked_indices = list(range(len(records)))
-                return similarities, ranked_indices
+        query = self._parse_query(index, query_string)
+        if query is None:
+            # If all parsing fails, return all records
+            similarities = [1.0] * len(records)
+            ranked_indices = list(range(len(records)))
+            return similarities, ranked_indices
 
         similarities = []
         ranked_indices = []
-        uuid_to_index = {record["uuid"]: i for i, record in enumerate(records)}
+        positions = self._positions_for(records)
+        matched = bytearray(len(records))  # 1 for every position already ranked
 
         try:
             with index.searcher() as searcher:
@@ -185,17 +428,15 @@ class WhooshSearchEngine:
 
                 # Convert Whoosh results back to original format
                 for hit in results:
-                    uuid = hit["uuid"]
-                    if uuid in uuid_to_index:
-                        original_index = uuid_to_index[uuid]
+                    original_index = positions.get(hit["uuid"])
+                    if original_index is not None:
                         ranked_indices.append(original_index)
+                        matched[original_index] = 1
                         # Use Whoosh's score as similarity
                         similarities.append(hit.score if hasattr(hit, "score") else 1.0)
 
             # Add remaining records with 0 similarity
-            remaining_indices = [
-                i for i in range(len(records)) if i not in ranked_indices
-            ]
+            remaining_indices = [i for i in range(len(records)) if not matched[i]]
             ranked_indices.extend(remaining_indices)
             similarities.extend([0.0] * len(remaining_indices))
 
@@ -207,6 +448,156 @@ class WhooshSearchEngine:
 
         return similarities, ranked_indices
 
+    def _parse_query(self, index, query_string):
+        """Parse a user query, returning None if it cannot be parsed at all"""
+        # Create a multi-field parser that searches across multiple fields
+        # team_number is matched whole, so a plain "12345" finds a team's work
+        parser = MultifieldParser(
+            ["title", "description", "author", "content", "team_number"], index.schema
+        )
+
+        try:
+            return parser.parse(query_string)
+        except:
+            # Fallback to simple content search if parsing fails
+            parser = QueryParser("content", index.schema)
+            try:
+                return parser.parse(query_string)
+            except:
+                return None
+
+    def search_ids(
+        self,
+        query_string,
+        records,
+        page=1,
+        page_size=None,
+        highlight=False,
+        filters=None,
+        facets=False,
+    ):
+        """
+        Search the index and return one page of matching records, best first.
+
+        Returns {"results": [{"id": uuid, "score": float}], "total": int}, with a
+        "highlight" HTML fragment per hit when highlight is set. With a page_size
+        only the top page * page_size hits are scored and sorted. Empty or
+        unusable queries match every record in its original order.
+
+        filters ({facet: [values]}, see facets.py) narrows the hits, and facets
+        adds per-facet value counts for the query under "facets".
+        """
+        index = self.build_index(records)
+        if filters or facets:
+            return self._search_faceted(
+                index,
+                query_string,
+                records,
+                page,
+                page_size,
+                highlight,
+                filters,
+                facets,
+            )
+        if not index or not query_string.strip():
+            return page_of_all(records, page, page_size)
+
+        query = self._parse_query(index, query_string)
+        if query is None:
+            return page_of_all(records, page, page_size)
+
+        positions = self._positions_for(records)
+        hits = []
+
+        try:
+            with index.searcher() as searcher:
+                if page_size:
+                    results = searcher.search_page(query, page, pagelen=page_size)
+                    total = results.total
+                    if results.pagenum != page:
+                        # Whoosh clamps to the last page; past the end means no hits
+                        results = []
+                else:
+                    results = searcher.search(query, limit=None)
+                    total = len(results)
+
+                for hit in results:
+                    if hit["uuid"] not in positions:
+                        continue
+                    result = {"id": hit["uuid"], "score": hit.score}
+                    if highlight:
+                        result["highlight"] = hit.highlights(
+                            "description"
+                        ) or hit.highlights("title")
+                    hits.append(result)
+        except Exception as e:
+            print(f"Search execution error: {e}")
+            return page_of_all(records, page, page_size)
+
+        return {"results": hits, "total": total}
+
+    def _search_faceted(
+        self, index, query_string, records, page, page_size, highlight, filters, facets
+    ):
+        """search_ids narrowed by facet filters, with facet counts if asked for"""
+        facet_index = self._facets_for(records)
+        filters = filters or {}
+        matched = set(facet_index.positions(facet_index.match(filters)))
+
+        query = None
+        if index and query_string.strip():
+            query = self._parse_query(index, query_string)
+
+        if query is None:
+            within = facet_index.all
+            hits = [
+                {"id": records[position]["uuid"], "score": 1.0}
+                for position in sorted(matched)
+            ]
+            hits = (
+                hits[(page - 1) * page_size : page * page_size] if page_size else hits
+            )
+            total = len(matched)
+        else:
+            try:
+                with index.searcher() as searcher:
+                    doc_positions = self._doc_positions_for(index, searcher, records)
+                    # Facet counts need every text hit, so score them all
+                    results = searcher.search(query, limit=None)
+                    ranked = [
+                        (index_in_results, doc_positions[docnum])
+                        for index_in_results, (_, docnum) in enumerate(results.top_n)
+                        if docnum in doc_positions
+                    ]
+                    within = facet_index.mask(position for _, position in ranked)
+                    ranked = [item for item in ranked if item[1] in matched]
+                    total = len(ranked)
+                    if page_size:
+                        ranked = ranked[(page - 1) * page_size : page * page_size]
+
+                    hits = []
+                    for index_in_results, position in ranked:
+                        result = {
+                            "id": records[position]["uuid"],
+                            "score": results.score(index_in_results),
+                        }
+                        if highlight:
+                            hit = results[index_in_results]
+                            result["highlight"] = hit.highlights(
+                                "description"
+                            ) or hit.highlights("title")
+                        hits.append(result)
+            except Exception as e:
+                print(f"Search execution error: {e}")
+                return self._search_faceted(
+                    None, "", records, page, page_size, False, filters, facets
+                )
+
+        response = {"results": hits, "total": total}
+        if facets:
+            response["facets"] = facet_index.counts(filters, within)
+        return response
+
     def get_suggestions(self, query_string, records, max_suggestions=5):
         """Get search suggestions using Whoosh's spelling correction"""
         index = self.build_index(records)
@@ -230,28 +621,146 @@ class WhooshSearchEngine:
             return []
 
 
-# Global search engine instance configured for serverless
+class IndexRegistry:
+    """
+    Keeps one WhooshSearchEngine per (base, category) so switching between
+    category pages does not throw away the other categories' indexes.
+
+    Whole indexes are evicted least-recently-used first once either the number
+    of indexes or their combined size exceeds the configured limits.
+    """
+
+    def __init__(
+        self,
+        max_indexes=16,
+        memory_budget=64 * 1024 * 1024,
+        use_memory=True,
+        background_optimize=False,
+    ):
+        self.max_indexes = max_indexes
+        self.memory_budget = memory_budget  # Bytes across all indexes
+        self.use_memory = use_memory
+        self.background_optimize = background_optimize
+        self._engines = OrderedDict()  # (base, category) -> WhooshSearchEngine
+        self._prebuilt = {}  # (base, category) -> (index dir, state) from the artifact
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, base=None, category=None):
+        """Return the engine for a category, creating it on first use"""
+        key = (base, category)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = WhooshSearchEngine(
+                    use_memory=self.use_memory,
+                    background_optimize=self.background_optimize,
+                )
+                if key in self._prebuilt:
+                    self._load_prebuilt(engine, *self._prebuilt[key])
+                self._engines[key] = engine
+            self._engines.move_to_end(key)
+            return engine
+
+    def register_prebuilt(self, base, category, path, state):
+        """Serve a category from a prebuilt index until it needs updating"""
+        with self._lock:
+            self._prebuilt[(base, category)] = (path, state)
+
+    def _load_prebuilt(self, engine, path, state):
+        try:
+            engine.load(path, state)
+        except Exception as e:
+            print(f"Could not open prebuilt index {path}, building instead: {e}")
+
+    def discard(self, base=None, category=None):
+        with self._lock:
+            self._engines.pop((base, category), None)
+
+    def clear(self):
+        with self._lock:
+            self._engines.clear()
+
+    def memory_usage(self):
+        with self._lock:
+            engines = list(self._engines.values())
+        return sum(engine.memory_size() for engine in engines)
+
+    def trim(self):
+        """Evict least recently used indexes until within both limits"""
+        with self._lock:
+            sizes = {key: engine.memory_size() for key, engine in self._engines.items()}
+            total = sum(sizes.values())
+            # Never evict the most recently used index, even if it alone is too big
+            while len(self._engines) > 1 and (
+                len(self._engines) > self.max_indexes or total > self.memory_budget
+            ):
+                key, _ = self._engines.popitem(last=False)
+                total -= sizes[key]
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            keys = list(self._engines.keys())
+        return {
+            "warm_indexes": [f"{base}/{category}" for base, category in keys],
+            "prebuilt_indexes": len(self._prebuilt),
+            "max_indexes": self.max_indexes,
+            "memory_bytes": self.memory_usage(),
+            "memory_budget_bytes": self.memory_budget,
+            "evictions": self.evictions,
+        }
+
+
+# Global index registry configured for serverless
 # For local development, you can change use_memory=False to use disk-based indexing
-_search_engine = WhooshSearchEngine(use_memory=True)
+_registry = IndexRegistry(
+    max_indexes=int(os.getenv("SEARCH_MAX_INDEXES", "16")),
+    memory_budget=int(os.getenv("SEARCH_MEMORY_BUDGET_MB", "64")) * 1024 * 1024,
+    use_memory=True,
+    background_optimize=os.getenv("SEARCH_BACKGROUND_OPTIMIZE", "").lower()
+    in ("1", "true", "yes"),
+)
+
+
+def _create_global_engine():
+    return WhooshSearchEngine(
+        use_memory=True,
+        background_optimize=_registry.background_optimize,
+        facets=GLOBAL_FACETS,
+    )
+
+
+# One index over every category, kept out of the registry so it is never evicted
+_global_engine = _create_global_engine()
+_global_lock = threading.Lock()
+_global_parts = {}  # (base, category) -> (version, records tagged with both)
+_global_records = None  # (versions of every category, combined records)
+# Where vault-wide responses are filed in _result_cache
+_GLOBAL_CACHE_KEY = ("*", "*")
 
+# Recent search_ids responses, reused until their category's index changes
+_result_cache = QueryCache(
+    max_entries=int(os.getenv("SEARCH_RESULT_CACHE_SIZE", "512")),
+    max_results=int(os.getenv("SEARCH_RESULT_CACHE_MAX_HITS", "500")),
+)
 
-def build_index(records):
+
+def build_index(records, base=None, category=None):
     """
     Legacy function for compatibility with existing code
     Returns (index, None, None, None) to match expected return format
     """
-    index = _search_engine.build_index(records)
+    index = _registry.get(base, category).build_index(records)
+    _registry.trim()
     return index, None, None, None
 
 
-def search(
-    query,
-    records=None,
-):
+def search(query, records=None, base=None, category=None):
     """
     Legacy function for compatibility with existing code
     Can be called as:
-    - search(query, records=records) - new way
+    - search(query, records=records, base=base, category=category) - new way
     - search(query, idf, vocab, tfidf_matrix) - old way (will need records from session)
     """
     if records is None:
@@ -260,7 +769,10 @@ def search(
         raise ValueError("Records must be provided for Whoosh search")
 
     try:
-        similarities, ranked_indices = _search_engine.search(query, records)
+        similarities, ranked_indices = _registry.get(base, category).search(
+            query, records
+        )
+        _registry.trim()
         return similarities, ranked_indices
     except Exception as e:
         print(f"Search error in legacy wrapper: {e}")
@@ -270,36 +782,358 @@ def search(
         return similarities, ranked_indices
 
 
-def get_search_suggestions(query, records):
+def search_ids(
+    query,
+    records,
+    base=None,
+    category=None,
+    page=1,
+    page_size=None,
+    highlight=False,
+    filters=None,
+    facets=False,
+):
+    """
+    One page of ranked hits for a category; see WhooshSearchEngine.search_ids.
+
+    Responses are served from _result_cache while the category's index is
+    unchanged, so repeated and popular queries skip Whoosh entirely.
+    """
+    try:
+        hits = _cached_search(
+            _registry.get(base, category),
+            (base, category),
+            query,
+            records,
+            page,
+            page_size,
+            highlight,
+            filters,
+            facets,
+        )
+        _registry.trim()
+        return hits
+    except Exception as e:
+        print(f"Search error in search_ids wrapper: {e}")
+        return page_of_all(records, page, page_size)
+
+
+def page_of_all(records, page=1, page_size=None):
+    """Every record in its original order, paged like search_ids"""
+    total = len(records)
+    if page_size:
+        records = records[(page - 1) * page_size : page * page_size]
+    return {
+        "results": [{"id": record["uuid"], "score": 1.0} for record in records],
+        "total": total,
+    }
+
+
+def _cached_search(
+    engine, cache_category, query, records, page, page_size, highlight, filters, facets
+):
+    """engine.search_ids through _result_cache, filed under cache_category"""
+    # Brings the index up to date first, so the generation below is current
+    index = engine.build_index(records)
+    cache_key = (
+        engine.generation(),
+        normalize_query(query),
+        filters_key(filters),
+        bool(facets),
+        page,
+        page_size,
+        bool(highlight),
+    )
+    if index is not None:
+        cached = _result_cache.get(cache_category, *cache_key)
+        if cached is not None:
+            return cached
+
+    start = time.perf_counter()
+    hits = engine.search_ids(
+        query,
+        records,
+        page=page,
+        page_size=page_size,
+        highlight=highlight,
+        filters=filters,
+        facets=facets,
+    )
+    # A refresh that moved the index on mid-search makes this response unsafe to file
+    if index is not None and engine.generation() == cache_key[0]:
+        _result_cache.put(
+            cache_category,
+            *cache_key,
+            response=hits,
+            elapsed=time.perf_counter() - start,
+        )
+    return hits
+
+
+def _combine_records(records_by_category):
+    """
+    Every category's records in one list, each tagged with its base and
+    category, for the vault-wide index.
+
+    Tagged copies are reused while a category's version is unchanged, and the
+    combined list keeps the categories' fingerprints, so the index only
+    re-indexes records that changed.
+    """
+    global _global_records
+
+    with _global_lock:
+        markers = tuple(
+            ((base, category), getattr(records, "version", None) or id(records))
+            for (base, category), records in sorted(records_by_category.items())
+        )
+        if _global_records is not None and _global_records[0] == markers:
+            return _global_records[1]
+
+        combined = []
+        fingerprints = {}
+        versions = hashlib.sha1()
+        complete = True
+        parts = {}
+        for key, marker in markers:
+            records = records_by_category[key]
+            part = _global_parts.get(key)
+            if part is None or part[0] != marker:
+                base, category = key
+                part = (
+                    marker,
+                    [dict(record, base=base, category=category) for record in records],
+                )
+            parts[key] = part
+            combined.extend(part[1])
+            fingerprints.update(getattr(records, "fingerprints", None) or {})
+
+            version = getattr(records, "version", None)
+            complete = complete and bool(version)
+            versions.update(f"{key[0]}/{key[1]}:{version}\n".encode())
+
+        _global_parts.clear()
+        _global_parts.update(parts)
+        combined = util.RecordList(
+            combined, versions.hexdigest() if complete else None, fingerprints
+        )
+        _global_records = (markers, combined)
+        return combined
+
+
+def search_vault(
+    query,
+    records_by_category,
+    page=1,
+    page_size=None,
+    highlight=False,
+    filters=None,
+    facets=False,
+):
+    """
+    Search every category at once.
+
+    records_by_category maps (base, category) to that category's records.
+    Works like search_ids, with filters from GLOBAL_FACETS, so results can be
+    narrowed by "base" and "category" too. Each hit names its base and
+    category, and "categories" holds the number of matches per category,
+    counted without any category filter.
+    """
+    engine = _global_engine
+    try:
+        records = _combine_records(records_by_category)
+        if not records:
+            return {"results": [], "total": 0, "categories": {}}
+
+        found = _cached_search(
+            engine,
+            _GLOBAL_CACHE_KEY,
+            query,
+            records,
+            page,
+            page_size,
+            highlight,
+            filters,
+            True,
+        )
+    except Exception as e:
+        print(f"Search error in search_vault: {e}")
+        return {"results": [], "total": 0, "categories": {}}
+
+    positions = engine._positions_for(records)
+    results = []
+    for hit in found["results"]:
+        record = records[positions[hit["id"]]]
+        results.append(dict(hit, base=record["base"], category=record["category"]))
+
+    response = {
+        "results": results,
+        "total": found["total"],
+        "categories": found["facets"]["category"],
+    }
+    if facets:
+        response["facets"] = found["facets"]
+    return response
+
+
+def get_search_suggestions(query, records, base=None, category=None):
     """Get search suggestions for the given query"""
     try:
-        return _search_engine.get_suggestions(query, records)
+        return _registry.get(base, category).get_suggestions(query, records)
     except Exception as e:
         print(f"Suggestions error: {e}")
         return []
 
 
-def force_index_rebuild():
-    """Force the search index to be rebuilt on next search"""
-    global _search_engine
-    _search_engine._records_hash = None
-    _search_engine.index = None
+def suggest(prefix, base=None, category=None, limit=8, load_records=None):
+    """
+    Type-ahead completions for a prefix from the category's term dictionary.
+
+    Lookups never rebuild or check the index. Only a category without an index
+    yet calls load_records() for its records and indexes them first.
+    """
+    try:
+        engine = _registry.get(base, category)
+        prefix_index = engine.prefix_index()
+        if prefix_index is None and load_records is not None:
+            records = load_records()
+            if not records or not isinstance(records, list):
+                return []
+            engine.build_index(records)
+            _registry.trim()
+            prefix_index = engine.prefix_index()
+        return prefix_index.complete(prefix, limit) if prefix_index else []
+    except Exception as e:
+        print(f"Suggest error: {e}")
+        return []
+
+
+def force_index_rebuild(base=None, category=None):
+    """
+    Force a category's search index to be rebuilt on next search.
+    With no category given, every warm index and the vault-wide index are dropped.
+    """
+    global _global_engine, _global_records
 
+    if base is None and category is None:
+        _registry.clear()
+        _result_cache.clear()
+        with _global_lock:
+            _global_engine = _create_global_engine()
+            _global_parts.clear()
+            _global_records = None
+    else:
+        _registry.discard(base, category)
+        _result_cache.clear((base, category))
 
-def get_search_stats(records):
-    """Get statistics about the search index"""
+
+def get_search_stats(records, base=None, category=None):
+    """Get statistics about a category's search index"""
     try:
-        index = _search_engine.build_index(records)
+        engine = _registry.get(base, category)
+        index = engine.build_index(records)
+        _registry.trim()
         if not index:
             return {"error": "Could not build index"}
 
         with index.searcher() as searcher:
             return {
+                "category": f"{base}/{category}",
                 "total_documents": searcher.doc_count_all(),
+                "index_builds": engine.build_count,
+                "index_updates": engine.update_count,
+                "last_update": engine.last_update,
+                "index_bytes": engine.memory_size(),
                 "indexed_fields": list(index.schema.names()),
-                "index_type": (
-                    "in-memory" if _search_engine.use_memory else "disk-based"
-                ),
+                "index_type": ("in-memory" if engine.use_memory else "disk-based"),
+                "registry": _registry.stats(),
+                "coalesced_builds": _build_flight.stats(),
+                "result_cache": _result_cache.stats(),
+                "global_index": _global_index_stats(),
             }
     except Exception as e:
         return {"error": str(e)}
+
+
+def _global_index_stats():
+    engine = _global_engine
+    records = engine._indexed_records
+    return {
+        "total_documents": len(records) if records is not None else 0,
+        "categories": len(_global_parts),
+        "index_builds": engine.build_count,
+        "index_updates": engine.update_count,
+        "last_update": engine.last_update,
+        "index_bytes": engine.memory_size(),
+    }
+
+
+def write_index_artifact(output_dir, sections=None):
+    """
+    Fetch every category and write its index, records and ETags to output_dir.
+    Returns a manifest describing what was written.
+    """
+    manifest = {"built_at": datetime.now(timezone.utc).isoformat(), "categories": {}}
+
+    for base, categories in (sections or util.SECTIONS).items():
+        for category in categories:
+            records = util.fetch_data_from_github(base, category)
+            if not isinstance(records, list) or not records:
+                print(f"  Skipping {base}/{category}: no records")
+                continue
+
+            engine = WhooshSearchEngine(use_memory=True)
+            engine.build_index(records)
+            name = f"{base}__{category}"
+            state = engine.save(os.path.join(output_dir, name, "index"))
+
+            with open(os.path.join(output_dir, name, "records.json"), "w") as f:
+                json.dump(
+                    {
+                        "state": state,
+                        "snapshot": util.export_cached_category(base, category),
+                    },
+                    f,
+                )
+
+            manifest["categories"][f"{base}/{category}"] = {
+                "dir": name,
+                "documents": len(records),
+            }
+            print(f"  ✓ {base}/{category}: {len(records)} records")
+
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=4)
+
+    return manifest
+
+
+def load_index_artifact(path=SEARCH_INDEX_DIR):
+    """
+    Register the prebuilt indexes in path and seed the record cache from them.
+
+    Indexes are opened lazily on first use. Records are revalidated against
+    GitHub on the first request, so only the changes since the artifact was
+    built are fetched and indexed. Returns the number of categories loaded.
+    """
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return 0
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        for key, info in manifest["categories"].items():
+            base, category = key.split("/", 1)
+            with open(os.path.join(path, info["dir"], "records.json")) as f:
+                saved = json.load(f)
+            if saved["snapshot"]:
+                util.seed_record_cache(base, category, saved["snapshot"])
+            _registry.register_prebuilt(
+                base, category, os.path.join(path, info["dir"], "index"), saved["state"]
+            )
+
+        return len(manifest["categories"])
+    except Exception as e:
+        print(f"Could not load prebuilt search index from {path}: {e}")
+        return 0
@@ -0,0 +1,22 @@
+"""
+Connections for the SQLite-backed stores (record_store.py, blob_cache.py and
+submission_queue.py).
+
+Each call opens its own short-lived connection, which keeps the stores safe to
+use from any thread. connect() commits on success, rolls back on error and
+always closes the connection; sqlite3's own context manager only does the first
+two.
+"""
+
+import sqlite3
+from contextlib import closing, contextmanager
+
+
+@contextmanager
+def connect(path, row_factory=None):
+    """A connection to path that runs as one transaction and is closed afterwards"""
+    with closing(sqlite3.connect(path, timeout=10)) as conn:
+        if row_factory is not None:
+            conn.row_factory = row_factory
+        with conn:
+            yield conn
@@ -135,3 +135,30 @@ function validateForm() {
     return true;
 }
 
+const SUBMISSION_STATUS_MESSAGES = {
+    queued: 'Sending your submission to GitHub...',
+    running: 'Sending your submission to GitHub...',
+    retrying: 'GitHub is slow to respond, retrying your submission...',
+    submitted: 'Your submission has been sent for review.',
+    failed: 'We could not send your submission to GitHub. Please notify a moderator in the Discord server.',
+};
+
+// Poll the status of a queued submission until it is submitted or has failed
+async function pollSubmissionStatus(element) {
+    const response = await fetch(`/api/submissions/${element.dataset.submissionId}`);
+    if (!response.ok) return;
+
+    const submission = await response.json();
+    element.textContent = SUBMISSION_STATUS_MESSAGES[submission.status] || '';
+
+    if (submission.status !== 'submitted' && submission.status !== 'failed') {
+        setTimeout(() => pollSubmissionStatus(element), 2000);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    const statusElement = document.getElementById('submissionStatus');
+    if (statusElement) {
+        pollSubmissionStatus(statusElement);
+    }
+});
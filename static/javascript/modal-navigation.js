@@ -54,15 +54,12 @@ function updateArrowStates(modalId, currentIndex, totalModals) {
     }
 }
 
-// Initialize arrow states when modals are shown
-document.addEventListener('DOMContentLoaded', function () {
-    const allModals = document.querySelectorAll('.portfolio-modal');
+// Update arrow states when a modal is shown, including ones on pages loaded later
+document.addEventListener('shown.bs.modal', function (e) {
+    if (!e.target.classList.contains('portfolio-modal')) return;
 
-    allModals.forEach((modal, index) => {
-        modal.addEventListener('shown.bs.modal', function () {
-            updateArrowStates(modal.id, index, allModals.length);
-        });
-    });
+    const allModals = Array.from(document.querySelectorAll('.portfolio-modal'));
+    updateArrowStates(e.target.id, allModals.indexOf(e.target), allModals.length);
 });
 
 // Add keyboard navigation (left/right arrows)
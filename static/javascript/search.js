@@ -1,34 +1,134 @@
-async function performSearch(query) {
+// The query and facet filters the cards on the page belong to, and the next
+// page of them to load
+let activeQuery = '';
+let activeFilters = {};
+let nextPage = null;
+// Bumped by every new search so pages of an older query are dropped
+let searchGeneration = 0;
+let loadingPage = false;
+let scrollObserver = null;
+
+function getCardContainer() {
+    return document.querySelector('#posts-div .row');
+}
+
+// One page of ranked cards, rendered by the server. The first page also
+// carries the facet counts used by the season tabs.
+async function fetchCards(query, page) {
     const response = await fetch('/api/search', {
         method: 'POST', headers: {
             'Content-Type': 'application/json',
-        }, body: JSON.stringify({query}),
+        }, body: JSON.stringify({query, page, filters: activeFilters, facets: page === 1, render: true}),
     });
 
     if (!response.ok) {
         const text = await response.text();
-        console.error("Server returned error HTML:", text);
+        console.error("Server returned error:", text);
+        return null;
+    }
+
+    return response.json();
+}
+
+async function performSearch(query) {
+    const container = getCardContainer();
+    if (!container) {
+        console.error("Could not find the posts container");
         return;
     }
-    //console.log(response);
 
-    const data = await response.json();
-    //console.log(data);
+    activeQuery = query.trim();
+    const generation = ++searchGeneration;
+    const data = await fetchCards(activeQuery, 1);
+    if (!data || generation !== searchGeneration) return;
 
-    // Parse the HTML string from the server
-    const parser = new DOMParser();
-    const doc = parser.parseFromString(data.template, 'text/html');
-    //console.log(data.template)
-    //console.log(doc);
+    container.innerHTML = data.html;
+    setNextPage(data.next_page);
+    const filtered = activeQuery !== '' || Object.keys(activeFilters).length > 0;
+    updateNoSearchResultsMessage(container, filtered && data.results.length === 0);
+    document.dispatchEvent(new CustomEvent('cards:updated', {detail: data}));
+}
+
+// Show only cards matching filters such as {season: ['2024-2025']}, within the active query
+function setSearchFilters(filters) {
+    activeFilters = filters;
+    return performSearch(activeQuery);
+}
+
+// Append the next page of the active query's cards
+async function loadNextPage() {
+    if (nextPage === null || loadingPage) return;
+
+    loadingPage = true;
+    const generation = searchGeneration;
+    try {
+        const data = await fetchCards(activeQuery, nextPage);
+        if (!data || generation !== searchGeneration) return;
+
+        getCardContainer().insertAdjacentHTML('beforeend', data.html);
+        setNextPage(data.next_page);
+        document.dispatchEvent(new CustomEvent('cards:updated', {detail: data}));
+    } finally {
+        loadingPage = false;
+    }
+}
+
+function setNextPage(page) {
+    nextPage = page || null;
+    const button = document.getElementById('loadMoreButton');
+    if (button) {
+        button.style.display = nextPage === null ? 'none' : '';
+        if (nextPage !== null) button.href = `?page=${nextPage}`;
+    }
 
-    // You can either replace the full body or just a specific section
-    const filteredPosts = doc.getElementById("posts-div");
-    //console.log(filteredPosts);
-    if (filteredPosts) {
-        // Replace contents of <body> without replacing the entire document
-        document.getElementById("posts-div").innerHTML = filteredPosts.innerHTML;
-    } else {
-        console.error("Parsed HTML does not contain filteredPosts");
+    // Observing again reports whether the sentinel is still in view,
+    // so short pages keep loading until the screen is filled
+    const sentinel = document.getElementById('cardsSentinel');
+    if (scrollObserver && sentinel) {
+        scrollObserver.unobserve(sentinel);
+        if (nextPage !== null) scrollObserver.observe(sentinel);
+    }
+}
+
+function setupInfiniteScroll() {
+    const sentinel = document.getElementById('cardsSentinel');
+    if (!sentinel) return;
+
+    const button = document.getElementById('loadMoreButton');
+    if (button) {
+        button.addEventListener('click', (e) => {
+            e.preventDefault();
+            loadNextPage();
+        });
+    }
+
+    if ('IntersectionObserver' in window) {
+        // Start loading a little before the user reaches the end of the cards
+        scrollObserver = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+        }, {rootMargin: '800px 0px'});
+    }
+    setNextPage(parseInt(sentinel.dataset.nextPage, 10));
+}
+
+function updateNoSearchResultsMessage(container, show) {
+    let message = container.querySelector('.no-search-results');
+
+    if (show && !message) {
+        message = document.createElement('div');
+        message.className = 'col-12 text-center no-search-results';
+        message.innerHTML = `
+            <div class="card">
+                <div class="card-body p-5">
+                    <h5 class="fw-bolder">No Results Found</h5>
+                </div>
+            </div>
+        `;
+        container.appendChild(message);
+    }
+
+    if (message) {
+        message.style.display = show ? '' : 'none';
     }
 }
 
@@ -46,9 +146,41 @@ function setupFormHandler() {
     });
 }
 
+// Offer completions from /api/suggest as the user types. Only the newest
+// request's suggestions are shown.
+function setupSuggestions() {
+    const input = document.getElementById('searchBox');
+    const list = document.getElementById('searchSuggestions');
+    if (!input || !list) return;
+
+    let latest = 0;
+    input.addEventListener('input', async function () {
+        const prefix = input.value.trim();
+        const request = ++latest;
+        if (prefix === '') {
+            list.replaceChildren();
+            return;
+        }
+
+        const response = await fetch(`/api/suggest?q=${encodeURIComponent(prefix)}`);
+        if (!response.ok || request !== latest) return;
+        const data = await response.json();
+        if (request !== latest) return;
+
+        list.replaceChildren(...data.suggestions.map(suggestion => {
+            const option = document.createElement('option');
+            option.value = suggestion.text;
+            option.label = suggestion.type;
+            return option;
+        }));
+    });
+}
+
 function clearSearch() {
     document.getElementById("searchBox").value = ""; // Clear input
     performSearch("") // Perform search with empty query to clear results
 }
 
 document.addEventListener('DOMContentLoaded', setupFormHandler);
+document.addEventListener('DOMContentLoaded', setupInfiniteScroll);
+document.addEventListener('DOMContentLoaded', setupSuggestions);
@@ -0,0 +1,179 @@
+"""
+Durable job table for contribute-form submissions.
+
+/submit-pr only validates the form and stores the encoded files here; a
+background worker in contribute.py does the GitHub calls afterwards. Jobs are
+kept in SQLite next to their files, so unfinished submissions are resumed after
+a restart and their progress can be polled from /api/submissions/<id>.
+
+Several processes can share one table (gunicorn workers, the Flask reloader's
+parent and child). A worker claims a job before running it and holds a lease
+that it renews with every update. Others can only take the job over once that
+lease has expired, so a job never runs twice at the same time. Background
+workers sweep the table periodically for jobs whose worker died.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from sqlite_db import connect
+
+SUBMISSION_DIR = os.getenv(
+    "SUBMISSION_DIR", os.path.join(tempfile.gettempdir(), "openvault-submissions")
+)
+
+# Jobs in these states still have GitHub work left to do
+PENDING_STATUSES = ("queued", "running", "retrying")
+# Seconds a claimed job stays reserved for its worker without an update
+SUBMISSION_LEASE_SECONDS = float(os.getenv("SUBMISSION_LEASE_SECONDS", "300"))
+
+
+class SubmissionStore:
+    def __init__(self, directory, lease_seconds=SUBMISSION_LEASE_SECONDS):
+        self.directory = directory
+        self.lease_seconds = lease_seconds
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "submissions.sqlite3")
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, step TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, payload TEXT NOT NULL, "
+                "commit_sha TEXT, pr_url TEXT, error TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "owner TEXT, lease_until REAL)"
+            )
+            # Tables created before jobs were claimed lack the lease columns
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(submissions)")
+            }
+            for column in ("owner TEXT", "lease_until REAL"):
+                if column.split()[0] not in columns:
+                    conn.execute(f"ALTER TABLE submissions ADD COLUMN {column}")
+
+    def _files_dir(self, job_id):
+        return os.path.join(self.directory, job_id)
+
+    def create(self, payload, files):
+        """
+        Stores a new queued job and returns its ID.
+
+        files is a list of {"path", "body"} dicts from contribute.encode_blob;
+        each body is copied to disk and closed.
+        """
+        job_id = uuid.uuid4().hex
+        files_dir = self._files_dir(job_id)
+        os.makedirs(files_dir)
+
+        payload = dict(payload, files=[])
+        for index, file in enumerate(files):
+            body_file = f"{index}.json"
+            with file["body"] as body, open(
+                os.path.join(files_dir, body_file), "wb"
+            ) as out:
+                shutil.copyfileobj(body, out)
+            payload["files"].append({"path": file["path"], "body_file": body_file})
+
+        now = time.time()
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            conn.execute(
+                "INSERT INTO submissions (id, status, payload, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            row = conn.execute(
+                "SELECT * FROM submissions WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def claim(self, job_id, owner):
+        """
+        Reserve a pending job for owner, returning whether it was claimed.
+
+        Fails while another worker's lease on the job is still running.
+        """
+        now = time.time()
+        placeholders = ", ".join("?" for _ in PENDING_STATUSES)
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            claimed = conn.execute(
+                "UPDATE submissions SET status = 'running', owner = ?, "
+                "lease_until = ?, updated_at = ? "
+                f"WHERE id = ? AND status IN ({placeholders}) "
+                "AND (lease_until IS NULL OR lease_until < ?)",
+                (owner, now + self.lease_seconds, now, job_id, *PENDING_STATUSES, now),
+            ).rowcount
+        return claimed == 1
+
+    def update(self, job_id, owner=None, **fields):
+        """
+        Set fields on a job. With owner, only while owner still holds the job,
+        renewing its lease; returns whether the job was updated.
+        """
+        fields["updated_at"] = time.time()
+        condition = "id = ?"
+        params = [job_id]
+        if owner is not None:
+            fields["lease_until"] = fields["updated_at"] + self.lease_seconds
+            condition += " AND owner = ?"
+            params.append(owner)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            updated = conn.execute(
+                f"UPDATE submissions SET {assignments} WHERE {condition}",
+                (*fields.values(), *params),
+            ).rowcount
+        return updated == 1
+
+    def pending(self):
+        """IDs of jobs that have not finished, oldest first"""
+        placeholders = ", ".join("?" for _ in PENDING_STATUSES)
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            rows = conn.execute(
+                f"SELECT id FROM submissions WHERE status IN ({placeholders}) "
+                "ORDER BY created_at",
+                PENDING_STATUSES,
+            )
+            return [row["id"] for row in rows]
+
+    def stalled(self):
+        """
+        IDs of unfinished jobs that no live worker holds, oldest first: those
+        whose lease has expired, and queued jobs nobody claimed within a lease
+        """
+        now = time.time()
+        placeholders = ", ".join("?" for _ in PENDING_STATUSES)
+        with connect(self.path, row_factory=sqlite3.Row) as conn:
+            rows = conn.execute(
+                f"SELECT id FROM submissions WHERE status IN ({placeholders}) "
+                "AND (lease_until < ? OR (lease_until IS NULL AND updated_at < ?)) "
+                "ORDER BY created_at",
+                (*PENDING_STATUSES, now, now - self.lease_seconds),
+            )
+            return [row["id"] for row in rows]
+
+    def open_files(self, job):
+        """The job's files as {"path", "body"} dicts with open blob bodies"""
+        files_dir = self._files_dir(job["id"])
+        return [
+            {
+                "path": file["path"],
+                "body": open(os.path.join(files_dir, file["body_file"]), "rb"),
+            }
+            for file in job["payload"]["files"]
+        ]
+
+    def remove_files(self, job_id):
+        shutil.rmtree(self._files_dir(job_id), ignore_errors=True)
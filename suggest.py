@@ -0,0 +1,88 @@
+"""
+Term dictionary for type-ahead suggestions.
+
+Titles, authors, tags and team numbers of a category's records are kept as a
+sorted array of lowercase keys, so completing a prefix is one binary search
+plus a short forward scan. Titles and authors are also keyed from each of
+their words, so "drive" completes "Mecanum Drive Code". WhooshSearchEngine
+builds one PrefixIndex per index generation; lookups never touch Whoosh.
+"""
+
+import bisect
+
+# Record fields offered as completions, and how their values are read
+FIELDS = {
+    "title": lambda record: [record.get("title")],
+    "author": lambda record: [record.get("author")],
+    "tag": lambda record: record.get("tags") or [],
+    "team": lambda record: [record.get("team_number")],
+}
+
+# Fields whose later words are keyed too, not just the start of the value
+_WORD_KEYED = {"title", "author"}
+
+# Keys examined per lookup before ranking, which bounds the cost of short prefixes
+_SCAN_LIMIT = 200
+
+
+def normalize_prefix(text):
+    return " ".join(str(text).lower().split())
+
+
+class PrefixIndex:
+    def __init__(self, records):
+        counts = {}  # (field, text) -> number of records carrying it
+        for record in records:
+            for field, values_of in FIELDS.items():
+                for value in values_of(record):
+                    text = " ".join(str(value).split()) if value is not None else ""
+                    if text:
+                        counts[(field, text)] = counts.get((field, text), 0) + 1
+        self.terms = [(field, text, count) for (field, text), count in counts.items()]
+
+        keys = []
+        for number, (field, text, _) in enumerate(self.terms):
+            words = text.lower().split()
+            starts = range(len(words)) if field in _WORD_KEYED else [0]
+            for start in starts:
+                keys.append((" ".join(words[start:]), start == 0, number))
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._from_start = [from_start for _, from_start, _ in keys]
+        self._numbers = [number for _, _, number in keys]
+
+    def __len__(self):
+        return len(self._keys)
+
+    def complete(self, prefix, limit=8):
+        """
+        Up to limit terms starting with prefix, as [{"text", "type", "count"}].
+
+        Terms that start with the prefix rank above those with a later word
+        matching it, then terms found on more records come first.
+        """
+        prefix = normalize_prefix(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        found = {}  # term number -> whether it matched from its first word
+        start = bisect.bisect_left(self._keys, prefix)
+        for i in range(start, min(start + _SCAN_LIMIT, len(self._keys))):
+            if not self._keys[i].startswith(prefix):
+                break
+            number = self._numbers[i]
+            found[number] = found.get(number, False) or self._from_start[i]
+
+        ranked = sorted(
+            found,
+            key=lambda number: (
+                not found[number],
+                -self.terms[number][2],
+                len(self.terms[number][1]),
+                self.terms[number][1],
+            ),
+        )
+        return [
+            {"text": text, "type": field, "count": count}
+            for field, text, count in (self.terms[number] for number in ranked[:limit])
+        ]
@@ -0,0 +1,65 @@
+"""
+Create or update a local mirror of the OpenVaultFiles repository.
+
+The app reads records from the mirror instead of GitHub when DATA_SOURCE is set
+to "mirror". Each sync lists the whole tree in one call and only downloads the
+files that changed since the previous sync, so it is cheap to run on a schedule.
+
+Usage:
+    python sync_mirror.py [--path=openvault_mirror] [--info-only] [--workers=16]
+
+Examples:
+    # Mirror the whole vault into ./openvault_mirror
+    python sync_mirror.py
+
+    # Mirror only the info.json files the website reads
+    python sync_mirror.py --info-only --path=/srv/openvault_mirror
+"""
+
+import argparse
+import time
+
+import util
+from github_client import github
+from mirror import LocalMirror
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sync a local mirror of OpenVaultFiles"
+    )
+    parser.add_argument(
+        "--path",
+        default=util.MIRROR_PATH,
+        help=f"Mirror directory (default: {util.MIRROR_PATH})",
+    )
+    parser.add_argument(
+        "--info-only",
+        action="store_true",
+        help="Only mirror info.json files, skipping images, zips and PDFs",
+    )
+    parser.add_argument("--workers", type=int, default=util.FETCH_MAX_WORKERS)
+    args = parser.parse_args()
+
+    path_filter = None
+    if args.info_only:
+        path_filter = lambda path: path.endswith("/info.json")
+
+    print(f"Syncing mirror in {args.path}...")
+    start = time.perf_counter()
+    result = LocalMirror(args.path).sync(
+        github,
+        util.GITHUB_API_BASE,
+        util.GITHUB_RAW_ROOT,
+        workers=args.workers,
+        path_filter=path_filter,
+    )
+
+    print(
+        f"\n✓ {result['downloaded']} files downloaded, {result['deleted']} deleted, "
+        f"{result['unchanged']} unchanged ({time.perf_counter() - start:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
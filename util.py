@@ -1,10 +1,56 @@
+import hashlib
+import json
+import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from json.decoder import JSONDecodeError
 
-import requests
 from requests import JSONDecodeError
 
+from blob_cache import blob_cache
+from github_client import github
+from mirror import LocalMirror, git_blob_sha
+from singleflight import SingleFlight
+
+GITHUB_API_BASE = "https://api.github.com/repos/AlpineRobotics25710/OpenVaultFiles"
+GITHUB_RAW_ROOT = "https://raw.githubusercontent.com/AlpineRobotics25710/OpenVaultFiles"
+# Links handed to users follow main; fetches pin the commit they listed instead
+GITHUB_RAW_BASE = f"{GITHUB_RAW_ROOT}/main"
+
+# Number of info.json files downloaded in parallel for a single category
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "16"))
+# Seconds to wait on any single GitHub request
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "10"))
+# Seconds a category's records are served from memory before revalidating
+RECORD_CACHE_TTL = float(os.getenv("RECORD_CACHE_TTL", "300"))
+# Number of categories kept in the record cache (least recently used evicted)
+RECORD_CACHE_SIZE = int(os.getenv("RECORD_CACHE_SIZE", "32"))
+# Where records are read from: "github", or "mirror" for a local copy of the vault
+DATA_SOURCE = os.getenv("DATA_SOURCE", "github")
+# Root of the local mirror used when DATA_SOURCE is "mirror" (see sync_mirror.py)
+MIRROR_PATH = os.getenv("MIRROR_PATH", "openvault_mirror")
+
+
+# Every category page, grouped by section, as laid out in OpenVaultFiles/ftc
+SECTIONS = {
+    "code": ["autonomous", "full-repo", "mechanism-control", "teleop", "vision"],
+    "cad": [
+        "active-intakes",
+        "arms",
+        "claws",
+        "dead-axles",
+        "drivetrains",
+        "linkages",
+        "outtakes",
+        "power-transmissions",
+        "robots",
+    ],
+    "portfolios": ["portfolios"],
+}
 
 # FTC Season name mapping
 SEASON_NAMES = {
@@ -35,96 +81,258 @@ def format_season_with_name(season_year):
     return season_year
 
 
-def fetch_data_from_github(section, sub_section):
-    api_url = f"https://api.github.com/repos/AlpineRobotics25710/OpenVaultFiles/contents/ftc/{section}/{sub_section}"
-    raw_base_url = (
-        "https://raw.githubusercontent.com/AlpineRobotics25710/OpenVaultFiles/main/ftc"
+# (section, sub_section) -> {"records", "etag", "commit", "commit_etag", "files",
+# "fetched_at"}
+_record_cache = OrderedDict()
+_record_cache_lock = threading.Lock()
+_record_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "revalidations": 0,
+    "not_modified": 0,
+    "files_downloaded": 0,
+    "files_not_modified": 0,
+    "files_unchanged": 0,
+    "files_from_blob_cache": 0,
+    "evictions": 0,
+}
+
+# Records read from local mirrors, keyed by (mirror root, section, sub_section)
+_mirror_cache = {}
+
+# Concurrent GitHub fetches of the same category share one crawl
+_fetch_flight = SingleFlight()
+
+
+def record_id(section, sub_section, entry_name):
+    """Stable ID for an entry, derived from its path in OpenVaultFiles"""
+    return str(
+        uuid.uuid5(uuid.NAMESPACE_URL, f"ftc/{section}/{sub_section}/{entry_name}")
     )
 
-    records = []
-    response = requests.get(api_url)
 
-    if response.status_code == 200:
-        try:
-            entries = response.json()
-        except JSONDecodeError:
-            return {"error": "Failed to decode GitHub API response."}
+def build_record(section, sub_section, entry_name, post_info_json):
+    """Convert a parsed info.json payload into the record dict used by the templates"""
+    raw_base_url = f"{GITHUB_RAW_BASE}/ftc"
 
-        for entry in entries:
-            if entry["type"] == "dir" and "filler" not in entry["name"]:
-                info_url = (
-                    f"{raw_base_url}/{section}/{sub_section}/{entry['name']}/info.json"
-                )
-                post_info_resp = requests.get(info_url)
-
-                if post_info_resp.status_code == 200:
-                    try:
-                        post_info_json = post_info_resp.json()
-                    except JSONDecodeError:
-                        continue
-
-                    # Support both new seasons-used and old years-used for backwards compatibility
-                    seasons_raw = post_info_json.get(
-                        "seasons-used", post_info_json.get("years-used", [])
-                    )
-                    # Ensure it's a list
-                    if isinstance(seasons_raw, str):
-                        seasons_raw = [seasons_raw]
-
-                    # Get tags (default to empty array if not present)
-                    tags = post_info_json.get("tags", [])
-                    if isinstance(tags, str):
-                        tags = [tags]
-
-                    record = {
-                        "uuid": str(uuid.uuid4()),
-                        "preview_image_url": f"{raw_base_url}/{section}/{sub_section}/{entry['name']}/{post_info_json['preview-image-name']}",
-                        "title": post_info_json["title"],
-                        "author": post_info_json["author"],
-                        "description": post_info_json["description"],
-                        "team_number": post_info_json["team-number"],
-                        "seasons_used": seasons_raw,
-                        "seasons_display": [
-                            format_season_with_name(s) for s in seasons_raw
-                        ],
-                        "tags": tags,
-                    }
-
-                    if "timestamp" in post_info_json:
-                        record["timestamp"] = (
-                            datetime.fromisoformat(post_info_json["timestamp"])
-                            .date()
-                            .strftime("%m/%d/%Y")
-                        )
-
-                    if section == "code":
-                        # Check if it's a GitHub link or download
-                        if post_info_json.get("github-link"):
-                            record["github_link"] = post_info_json["github-link"]
-                            record["download_url"] = ""  # No download for GitHub links
-                        else:
-                            record["download_url"] = (
-                                f"{raw_base_url}/{section}/{sub_section}/{entry['name']}/{post_info_json.get('download-name', '')}"
-                            )
-                            record["github_link"] = ""
-                        record["language"] = post_info_json["language"]
-                        record["used_in_comp"] = post_info_json["used-in-comp"]
-
-                    elif section == "portfolios":
-                        record["download_url"] = (
-                            f"{raw_base_url}/{section}/{sub_section}/{entry['name']}/{post_info_json['file-name']}"
-                        )
-                        record["awards_won"] = post_info_json["awards-won"]
-
-                    elif section == "cad":
-                        record["used_in_comp"] = post_info_json["used-in-comp"]
-                        record["onshape_link"] = post_info_json["onshape-link"]
-
-                    records.append(record)
-    else:
-        return {"error": f"GitHub API returned status {response.status_code}"}
+    # Support both new seasons-used and old years-used for backwards compatibility
+    seasons_raw = post_info_json.get(
+        "seasons-used", post_info_json.get("years-used", [])
+    )
+    # Ensure it's a list
+    if isinstance(seasons_raw, str):
+        seasons_raw = [seasons_raw]
+
+    # Get tags (default to empty array if not present)
+    tags = post_info_json.get("tags", [])
+    if isinstance(tags, str):
+        tags = [tags]
+
+    record = {
+        "uuid": record_id(section, sub_section, entry_name),
+        "preview_image_url": f"{raw_base_url}/{section}/{sub_section}/{entry_name}/{post_info_json['preview-image-name']}",
+        "title": post_info_json["title"],
+        "author": post_info_json["author"],
+        "description": post_info_json["description"],
+        "team_number": post_info_json["team-number"],
+        "seasons_used": seasons_raw,
+        "seasons_display": [format_season_with_name(s) for s in seasons_raw],
+        "tags": tags,
+    }
+
+    if "timestamp" in post_info_json:
+        record["timestamp"] = (
+            datetime.fromisoformat(post_info_json["timestamp"])
+            .date()
+            .strftime("%m/%d/%Y")
+        )
+
+    if section == "code":
+        # Check if it's a GitHub link or download
+        if post_info_json.get("github-link"):
+            record["github_link"] = post_info_json["github-link"]
+            record["download_url"] = ""  # No download for GitHub links
+        else:
+            record["download_url"] = (
+                f"{raw_base_url}/{section}/{sub_section}/{entry_name}/{post_info_json.get('download-name', '')}"
+            )
+            record["github_link"] = ""
+        record["language"] = post_info_json["language"]
+        record["used_in_comp"] = post_info_json["used-in-comp"]
+
+    elif section == "portfolios":
+        record["download_url"] = (
+            f"{raw_base_url}/{section}/{sub_section}/{entry_name}/{post_info_json['file-name']}"
+        )
+        record["awards_won"] = post_info_json["awards-won"]
+
+    elif section == "cad":
+        record["used_in_comp"] = post_info_json["used-in-comp"]
+        record["onshape_link"] = post_info_json["onshape-link"]
+
+    return record
+
+
+class RecordList(list):
+    """
+    A category's records together with upstream version markers.
+
+    fingerprints maps each record's uuid to the git SHA of its directory and
+    version changes whenever any of them does, so consumers such as the search
+    index can detect changes without hashing the records themselves.
+    """
+
+    def __init__(self, records=(), version=None, fingerprints=None):
+        super().__init__(records)
+        self.version = version
+        self.fingerprints = fingerprints or {}
+
+    def copy(self):
+        return RecordList(self, self.version, self.fingerprints)
+
+
+def _records_version(records, fingerprints):
+    """Version marker for a record list; None if any record lacks a fingerprint"""
+    digest = hashlib.sha1()
+    for record in records:
+        fingerprint = fingerprints.get(record["uuid"])
+        if not fingerprint:
+            return None
+        digest.update(f"{record['uuid']}:{fingerprint}\n".encode())
+    return digest.hexdigest()
+
+
+def _fetch_record(section, sub_section, entry_name, commit, cached=None):
+    """
+    Download and parse a single info.json as of commit.
+
+    Returns a {"etag", "record", "payload"} cache entry, the cached entry
+    unchanged when GitHub answers 304 Not Modified, or None if the file is
+    unavailable. Raw URLs for a commit never change content, unlike main's,
+    which the CDN may serve stale for minutes after a merge.
+    """
+    info_url = (
+        f"{GITHUB_RAW_ROOT}/{commit}/ftc/{section}/{sub_section}/{entry_name}/info.json"
+    )
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    post_info_resp = github.get(info_url, headers=headers, timeout=FETCH_TIMEOUT)
+
+    if post_info_resp.status_code == 304 and cached:
+        _count("files_not_modified")
+        return cached
+
+    if post_info_resp.status_code != 200:
+        return None
+
+    try:
+        post_info_json = post_info_resp.json()
+    except JSONDecodeError:
+        return None
+
+    _count("files_downloaded")
+    return {
+        "etag": post_info_resp.headers.get("ETag"),
+        "record": build_record(section, sub_section, entry_name, post_info_json),
+        "payload": post_info_json,
+    }
+
+
+def _count(counter, amount=1):
+    with _record_cache_lock:
+        _record_cache_stats[counter] += amount
+
+
+def _store_cache_entry(key, entry):
+    with _record_cache_lock:
+        _record_cache[key] = entry
+        _record_cache.move_to_end(key)
+        while len(_record_cache) > RECORD_CACHE_SIZE:
+            _record_cache.popitem(last=False)
+            _record_cache_stats["evictions"] += 1
+
+
+def get_record_cache_stats():
+    """Counters describing how well the record cache is shielding GitHub"""
+    with _record_cache_lock:
+        stats = dict(_record_cache_stats)
+        stats["cached_categories"] = len(_record_cache)
+    stats["ttl_seconds"] = RECORD_CACHE_TTL
+    stats["max_categories"] = RECORD_CACHE_SIZE
+    stats["coalesced_fetches"] = _fetch_flight.stats()
+    stats["blob_cache"] = blob_cache.stats() if blob_cache is not None else None
+    return stats
+
+
+def export_cached_category(section, sub_section):
+    """Snapshot of a cached category's records and ETags, or None if not cached"""
+    with _record_cache_lock:
+        entry = _record_cache.get((section, sub_section))
+    if not entry:
+        return None
+    return {
+        "records": list(entry["records"]),
+        "version": entry["records"].version,
+        "fingerprints": entry["records"].fingerprints,
+        "etag": entry["etag"],
+        "commit": entry.get("commit"),
+        "commit_etag": entry.get("commit_etag"),
+        "file_etags": {name: f["etag"] for name, f in entry["files"].items()},
+        "file_shas": {name: f.get("sha") for name, f in entry["files"].items()},
+    }
+
+
+def seed_record_cache(section, sub_section, snapshot):
+    """
+    Load a snapshot from export_cached_category into the cache.
+
+    The entry is marked stale, so the first request revalidates it with
+    conditional requests and only downloads info.json files that changed.
+    """
+    key = (section, sub_section)
+    with _record_cache_lock:
+        if key in _record_cache:
+            return
+
+    records = RecordList(
+        snapshot["records"], snapshot.get("version"), snapshot.get("fingerprints")
+    )
+    records_by_id = {record["uuid"]: record for record in records}
+    # Entry SHAs let unchanged entries be reused without downloading them
+    file_shas = snapshot.get("file_shas", {})
+    files = {}
+    for name, etag in snapshot["file_etags"].items():
+        record = records_by_id.get(record_id(section, sub_section, name))
+        if record is not None:
+            files[name] = {"etag": etag, "sha": file_shas.get(name), "record": record}
+
+    _store_cache_entry(
+        key,
+        {
+            "records": records,
+            "etag": snapshot["etag"],
+            "commit": snapshot.get("commit"),
+            "commit_etag": snapshot.get("commit_etag"),
+            "files": files,
+            "fetched_at": float("-inf"),
+        },
+    )
+
+
+def clear_record_cache():
+    """Drop every cached category so the next fetch goes to GitHub unconditionally"""
+    with _record_cache_lock:
+        _record_cache.clear()
+        _mirror_cache.clear()
+    if blob_cache is not None:
+        blob_cache.clear()
+
+
+def _sort_by_timestamp(records):
+    """Sort records by timestamp - earliest first, records without timestamp at the end"""
 
-    # Sort records by timestamp - earliest first, records without timestamp at the end
     def sort_key(record):
         ts = record.get("timestamp", "")
         if not ts:
@@ -139,4 +347,274 @@ def fetch_data_from_github(section, sub_section):
 
     records.sort(key=sort_key)
 
+
+def peek_cached_records(section, sub_section):
+    """
+    A category's cached records regardless of age, as (records, fresh), or None.
+
+    Lets callers answer from stale records and revalidate in the background.
+    Mirror reads are cheap and always current, so they are returned as fresh.
+    """
+    if DATA_SOURCE == "mirror":
+        records = fetch_data_from_mirror(section, sub_section)
+        return (records, True) if isinstance(records, list) else None
+
+    key = (section, sub_section)
+    with _record_cache_lock:
+        cached = _record_cache.get(key)
+        if cached:
+            _record_cache.move_to_end(key)
+    if not cached:
+        return None
+
+    fresh = time.monotonic() - cached["fetched_at"] < RECORD_CACHE_TTL
+    if fresh:
+        _count("hits")
+    return cached["records"].copy(), fresh
+
+
+def fetch_records(section, sub_section, force_refresh=False):
+    """Return the records for one category from the configured DATA_SOURCE"""
+    if DATA_SOURCE == "mirror":
+        if force_refresh:
+            with _record_cache_lock:
+                _mirror_cache.pop((MIRROR_PATH, section, sub_section), None)
+        return fetch_data_from_mirror(section, sub_section)
+    return fetch_data_from_github(section, sub_section, force_refresh=force_refresh)
+
+
+def fetch_data_from_mirror(section, sub_section, mirror_path=None):
+    """
+    Return the records for one category, read from a local mirror of the vault.
+
+    Records stay in memory until a sync changes the mirror's manifest, so a
+    repeat read costs a single stat() call. A plain git checkout has no
+    manifest, so its records are re-read after RECORD_CACHE_TTL instead.
+    """
+    mirror = LocalMirror(mirror_path or MIRROR_PATH)
+    key = (mirror.root, section, sub_section)
+    version = mirror.version()
+
+    with _record_cache_lock:
+        cached = _mirror_cache.get(key)
+    if cached and (
+        cached["version"] == version
+        if version is not None
+        else time.monotonic() - cached["read_at"] < RECORD_CACHE_TTL
+    ):
+        _count("hits")
+        return cached["records"].copy()
+
+    _count("misses")
+    category_path = f"ftc/{section}/{sub_section}"
+    entry_names = mirror.list_dirs(category_path)
+    if not entry_names:
+        return {"error": f"{category_path} not found in mirror at {mirror.root}"}
+
+    manifest_files = mirror.manifest()["files"]
+    records = []
+    fingerprints = {}
+    for entry_name in entry_names:
+        if "filler" in entry_name:
+            continue
+        info_path = f"{category_path}/{entry_name}/info.json"
+        content = mirror.read_bytes(info_path)
+        if content is None:
+            continue
+        try:
+            post_info_json = json.loads(content)
+        except ValueError:
+            continue
+
+        record = build_record(section, sub_section, entry_name, post_info_json)
+        records.append(record)
+        fingerprints[record["uuid"]] = manifest_files.get(info_path) or git_blob_sha(
+            content
+        )
+
+    _sort_by_timestamp(records)
+    records = RecordList(records, _records_version(records, fingerprints), fingerprints)
+
+    with _record_cache_lock:
+        _mirror_cache[key] = {
+            "records": records,
+            "version": version,
+            "read_at": time.monotonic(),
+        }
+    return records.copy()
+
+
+def fetch_data_from_github(section, sub_section, max_workers=None, force_refresh=False):
+    """
+    Return the records for one category, served from the record cache when possible.
+
+    Within RECORD_CACHE_TTL the cached records are returned without any network
+    call. After that (or with force_refresh) the listing and every info.json are
+    revalidated with If-None-Match, so unchanged content costs only 304s.
+    Concurrent revalidations of the same category share a single crawl.
+    """
+    key = (section, sub_section)
+    with _record_cache_lock:
+        cached = _record_cache.get(key)
+        if cached:
+            _record_cache.move_to_end(key)
+
+    if (
+        cached
+        and not force_refresh
+        and time.monotonic() - cached["fetched_at"] < RECORD_CACHE_TTL
+    ):
+        _count("hits")
+        return cached["records"].copy()
+
+    records = _fetch_flight.do(
+        key, _revalidate_category, section, sub_section, cached, max_workers
+    )
+    return records.copy() if isinstance(records, list) else records
+
+
+def _reuse_unchanged_files(section, sub_section, entry_shas, cached_files):
+    """
+    Cache entries for every entry whose directory SHA is already known.
+
+    Entries cached in memory under the same SHA are reused as they are; the
+    rest are rebuilt from payloads in the blob cache. Neither needs a request.
+    """
+    files = {}
+    for name, sha in entry_shas.items():
+        cached_file = cached_files.get(name)
+        if sha and cached_file and cached_file.get("sha") == sha:
+            files[name] = cached_file
+    _count("files_unchanged", len(files))
+
+    if blob_cache is None:
+        return files
+
+    missing = {name: sha for name, sha in entry_shas.items() if name not in files}
+    payloads = blob_cache.get_many(missing.values())
+    for name, sha in missing.items():
+        if sha not in payloads:
+            continue
+        try:
+            record = build_record(section, sub_section, name, payloads[sha])
+        except (KeyError, TypeError, ValueError):
+            continue
+        files[name] = {"etag": None, "sha": sha, "record": record}
+        _count("files_from_blob_cache")
+    return files
+
+
+def _not_modified(cached, **fields):
+    """Mark a cached category as revalidated and return its records"""
+    _count("not_modified")
+    cached.update(fields, fetched_at=time.monotonic())
+    return cached["records"]
+
+
+def _revalidate_category(section, sub_section, cached, max_workers):
+    """
+    Fetch a category from GitHub, reusing whatever the cached entry still matches.
+
+    The listing and every info.json are read at the commit main points at, so
+    each entry SHA is stored with the content it names.
+    """
+    key = (section, sub_section)
+    max_workers = max_workers or FETCH_MAX_WORKERS
+    headers = {}
+    if cached:
+        _count("revalidations")
+        if cached.get("commit_etag"):
+            headers["If-None-Match"] = cached["commit_etag"]
+    else:
+        _count("misses")
+
+    ref_response = github.get(
+        f"{GITHUB_API_BASE}/git/ref/heads/main", headers=headers, timeout=FETCH_TIMEOUT
+    )
+    if ref_response.status_code == 304 and cached:
+        return _not_modified(cached)
+    if ref_response.status_code != 200:
+        return {"error": f"GitHub API returned status {ref_response.status_code}"}
+    try:
+        commit = ref_response.json()["object"]["sha"]
+    except (JSONDecodeError, KeyError, TypeError):
+        return {"error": "Failed to decode GitHub API response."}
+    commit_etag = ref_response.headers.get("ETag")
+    if cached and cached.get("commit") == commit:
+        return _not_modified(cached, commit_etag=commit_etag)
+
+    api_url = f"{GITHUB_API_BASE}/contents/ftc/{section}/{sub_section}?ref={commit}"
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    response = github.get(api_url, headers=headers, timeout=FETCH_TIMEOUT)
+
+    # Other parts of the vault changed, but not this category
+    if response.status_code == 304 and cached:
+        return _not_modified(cached, commit=commit, commit_etag=commit_etag)
+
+    if response.status_code == 200:
+        try:
+            entries = response.json()
+        except JSONDecodeError:
+            return {"error": "Failed to decode GitHub API response."}
+
+        entry_shas = {
+            entry["name"]: entry.get("sha")
+            for entry in entries
+            if entry["type"] == "dir" and "filler" not in entry["name"]
+        }
+        entry_names = list(entry_shas)
+        cached_files = cached["files"] if cached else {}
+        files = _reuse_unchanged_files(section, sub_section, entry_shas, cached_files)
+
+        # Download every other info.json in parallel
+        to_fetch = [name for name in entry_names if name not in files]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = executor.map(
+                lambda name: _fetch_record(
+                    section, sub_section, name, commit, cached_files.get(name)
+                ),
+                to_fetch,
+            )
+            downloaded = {}
+            for name, file_entry in zip(to_fetch, fetched):
+                if file_entry is None:
+                    continue
+                file_entry = dict(file_entry, sha=entry_shas[name])
+                payload = file_entry.pop("payload", None)
+                if payload is not None and file_entry["sha"]:
+                    downloaded[file_entry["sha"]] = payload
+                files[name] = file_entry
+        if blob_cache is not None:
+            blob_cache.put_many(downloaded)
+
+        # Keep the listing order
+        files = {name: files[name] for name in entry_names if name in files}
+        records = [file_entry["record"] for file_entry in files.values()]
+    else:
+        return {"error": f"GitHub API returned status {response.status_code}"}
+
+    _sort_by_timestamp(records)
+
+    # The directory's git tree SHA changes whenever anything in the entry does
+    fingerprints = {
+        file_entry["record"]["uuid"]: entry_shas.get(name) or file_entry["etag"]
+        for name, file_entry in files.items()
+    }
+    records = RecordList(records, _records_version(records, fingerprints), fingerprints)
+
+    _store_cache_entry(
+        key,
+        {
+            "records": records,
+            "etag": response.headers.get("ETag"),
+            "commit": commit,
+            "commit_etag": commit_etag,
+            "files": files,
+            "fetched_at": time.monotonic(),
+        },
+    )
+
     return records